@@ -1,6 +1,10 @@
 from django.contrib import admin
-from .models import Account, Transaction
+from .models import Account, Transaction, Loan, ReconciliationRun, VelocityLimit
 
 # Register your models here.
 admin.site.register(Account)
-admin.site.register(Transaction)
\ No newline at end of file
+admin.site.register(Transaction)
+admin.site.register(Loan)
+admin.site.register(ReconciliationRun)
+
+admin.site.register(VelocityLimit)
\ No newline at end of file
@@ -0,0 +1,108 @@
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+
+from . import recipients
+from .decorators import api_customer_and_approved_required
+from .models import Account
+
+# Lightweight JSON endpoints for the mobile app. Every response carries an
+# ETag built from the account row alone (latest transaction id + version), so
+# a poll that sends If-None-Match gets a 304 without the transactions table
+# being touched or anything being serialised.
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        size = DEFAULT_PAGE_SIZE
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def _account_etag(request, *args, **kwargs):
+    state = Account.objects.filter(user=request.user).values_list('pk', 'last_transaction_id', 'version', 'is_frozen').first()
+    if state is None:
+        return None
+    pk, last_transaction_id, version, is_frozen = state
+    return f"{pk}-{last_transaction_id or 0}-{version}-{int(is_frozen)}"
+
+
+def _transactions_etag(request, *args, **kwargs):
+    etag = _account_etag(request)
+    if etag is None:
+        return None
+    # The page being asked for is part of the representation
+    return f"{etag}-p{request.GET.get('page', 1)}-{_page_size(request)}"
+
+
+def _serialize_transaction(tx):
+    return {
+        'id': tx.id,
+        'type': tx.transaction_type,
+        'amount': str(tx.amount),
+        'balance_after': str(tx.balance_after) if tx.balance_after is not None else None,
+        'description': tx.description,
+        'timestamp': tx.timestamp.isoformat(),
+    }
+
+
+@require_GET
+@api_customer_and_approved_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_account_etag)
+def account_summary(request):
+    account = get_object_or_404(Account, user=request.user)
+    return JsonResponse({
+        'account_number': account.account_number,
+        'balance': str(account.balance),
+        'is_frozen': account.is_frozen,
+        'last_transaction_id': account.last_transaction_id,
+        'version': account.version,
+    })
+
+
+@require_GET
+@api_customer_and_approved_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_transactions_etag)
+def transactions(request):
+    account = get_object_or_404(Account, user=request.user)
+    paginator = Paginator(account.transactions.order_by('-timestamp', '-id'), _page_size(request))
+    try:
+        page = paginator.page(request.GET.get('page', 1))
+    except PageNotAnInteger:
+        page = paginator.page(1)
+    except EmptyPage:
+        return JsonResponse({'detail': 'Page out of range.'}, status=404)
+
+    def page_url(number):
+        return f"{reverse('api_transactions')}?page={number}&page_size={paginator.per_page}"
+
+    return JsonResponse({
+        'count': paginator.count,
+        'page': page.number,
+        'num_pages': paginator.num_pages,
+        'next': page_url(page.next_page_number()) if page.has_next() else None,
+        'previous': page_url(page.previous_page_number()) if page.has_previous() else None,
+        'results': [_serialize_transaction(tx) for tx in page.object_list],
+    })
+
+
+@require_GET
+@api_customer_and_approved_required
+@cache_control(private=True, max_age=30)
+def recipient_preview(request):
+    account_number = request.GET.get('account_number', '').strip()
+    if not account_number:
+        return JsonResponse({'detail': 'account_number is required.'}, status=400)
+    result = recipients.preview(account_number)
+    if result is None:
+        return JsonResponse({'detail': 'No account with that number.'}, status=404)
+    return JsonResponse(result)
@@ -0,0 +1,41 @@
+import uuid
+
+import django
+from django.db import connections
+
+# Helpers for the `import_customers` command. Password hashing runs in
+# spawned worker processes, so like reconciliation.py this module must be
+# importable before Django is set up: models are imported inside functions.
+
+
+def init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def hash_passwords(passwords):
+    # Runs in a worker: the hashers are deliberately slow, this is where the CPU goes
+    from django.contrib.auth.hashers import make_password
+
+    return [make_password(password) for password in passwords]
+
+
+def allocate_account_numbers(count, taken=()):
+    """
+    `count` fresh account numbers in the same format Account.save() uses,
+    checked against the database in one query per round instead of one
+    query per account.
+    """
+    from .models import Account
+
+    allocated = set()
+    taken = set(taken)
+    while len(allocated) < count:
+        candidates = set()
+        while len(candidates) < count - len(allocated):
+            number = str(uuid.uuid4().int)[:10]
+            if number not in allocated and number not in taken:
+                candidates.add(number)
+        clashes = set(Account.objects.filter(account_number__in=candidates).values_list('account_number', flat=True))
+        allocated |= candidates - clashes
+    return list(allocated)
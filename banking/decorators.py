@@ -1,5 +1,6 @@
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.http import JsonResponse
 from accounts.models import CustomUser
 
 def manager_required(function):
@@ -42,4 +43,27 @@ def customer_and_approved_required(function):
             messages.error(request, "This area is for approved customers only.")
             return redirect('dashboard')
             
-    return wrap
\ No newline at end of file
+    return wrap
+
+
+def api_customer_and_approved_required(function):
+    """
+    Same rules as customer_and_approved_required, for JSON endpoints:
+    instead of redirecting, it answers 401 for anonymous users and 403 for
+    anyone who is not an approved customer.
+    """
+    def wrap(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'detail': 'Authentication required.'}, status=401)
+
+        # Same fresh lookup as above, so a revoked approval takes effect immediately
+        try:
+            current_user = CustomUser.objects.get(pk=request.user.pk)
+        except CustomUser.DoesNotExist:
+            return JsonResponse({'detail': 'Authentication required.'}, status=401)
+
+        if not current_user.is_staff and current_user.is_approved:
+            return function(request, *args, **kwargs)
+        return JsonResponse({'detail': 'This area is for approved customers only.'}, status=403)
+
+    return wrap
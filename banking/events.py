@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Publish/subscribe for the live update streams. Posting code calls publish()
+# from ordinary sync views; SSE views subscribe from the event loop. Each
+# subscriber is just a small asyncio.Queue that a parked coroutine waits on,
+# so idle connections cost nothing until something is published.
+
+
+class Subscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        # Runs on the subscriber's loop. A client that can't keep up loses its
+        # oldest updates rather than growing without bound.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Delivers events to subscribers in the same process. Fine for a single
+    ASGI worker; with several workers use RedisBroker so an event published
+    in one worker reaches streams held open by the others.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            # publish() is called from sync views, i.e. not on the subscriber's loop
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Its loop has shut down without the stream being closed
+                self.unsubscribe(subscription)
+
+    async def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Fans events out across workers through Redis pub/sub. Each worker holds a
+    single pattern subscription and hands messages to its local subscribers,
+    so the number of Redis connections doesn't grow with open streams.
+    """
+
+    def __init__(self, url, prefix='banking-events:', queue_size=100):
+        super().__init__(queue_size=queue_size)
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBroker requires the 'redis' package.")
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._listeners = {}
+
+    def publish(self, channel, event):
+        self._client.publish(self.prefix + channel, json.dumps(event))
+
+    async def subscribe(self, channel):
+        loop = asyncio.get_running_loop()
+        listener = self._listeners.get(loop)
+        if listener is None or listener.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+        return await super().subscribe(channel)
+
+    async def _listen(self):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(self.prefix + '*')
+        try:
+            async for message in pubsub.listen():
+                if message['type'] != 'pmessage':
+                    continue
+                channel = message['channel'].decode()[len(self.prefix):]
+                self.deliver(channel, json.loads(message['data']))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'BANKING_EVENTS', {})
+                backend = import_string(config.get('BACKEND', 'banking.events.InProcessBroker'))
+                _broker = backend(**config.get('OPTIONS', {}))
+    return _broker
+
+
+def publish(channel, event):
+    """
+    Publish once the surrounding transaction commits, so listeners never hear
+    about a posting that was rolled back. A broker failure is logged rather
+    than failing the request that made the change.
+    """
+    transaction.on_commit(lambda: get_broker().publish(channel, event), robust=True)
+
+
+def account_channel(account_id):
+    return f'account:{account_id}'
+
+
+MANAGERS_CHANNEL = 'managers'
@@ -0,0 +1,71 @@
+from decimal import Decimal, InvalidOperation
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+
+
+class MoneyField(models.BigIntegerField):
+    """
+    A money amount stored as a whole number of minor units (cents), but read
+    and written as a Decimal everywhere in Python.
+
+    Integer columns compare, index and SUM exactly on every backend, where
+    SQLite keeps DecimalField values as REAL and every aggregate has to be
+    converted back through Decimal. Amounts with more precision than the
+    minor unit are rejected rather than silently rounded.
+
+    Arithmetic in the database (F('balance') + amount) does not know about
+    the scaling, so update money with plain Python values, as the ledger does.
+    """
+    description = "Money amount stored as integer minor units"
+
+    def __init__(self, *args, decimal_places=2, **kwargs):
+        self.decimal_places = decimal_places
+        self.quantum = Decimal(1).scaleb(-decimal_places)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.decimal_places != 2:
+            kwargs['decimal_places'] = self.decimal_places
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return Decimal(value).scaleb(-self.decimal_places).quantize(self.quantum)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            amount = value if isinstance(value, Decimal) else Decimal(str(value))
+        except InvalidOperation:
+            raise exceptions.ValidationError(
+                self.error_messages['invalid'], code='invalid', params={'value': value}
+            )
+        if amount != amount.quantize(self.quantum):
+            raise exceptions.ValidationError(
+                "Ensure that there are no more than %(places)s decimal places.",
+                code='max_decimal_places', params={'places': self.decimal_places},
+            )
+        return amount.quantize(self.quantum)
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        amount = Decimal(str(value)) if not isinstance(value, Decimal) else value
+        minor = amount.scaleb(self.decimal_places)
+        if minor != minor.to_integral_value():
+            raise ValueError(f"{value} has more than {self.decimal_places} decimal places.")
+        return int(minor)
+
+    def formfield(self, **kwargs):
+        return super(models.BigIntegerField, self).formfield(**{
+            'form_class': forms.DecimalField,
+            'decimal_places': self.decimal_places,
+            'max_digits': 18,
+            **kwargs,
+        })
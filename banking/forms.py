@@ -1,20 +1,18 @@
 from django import forms
-from .models import Account, Loan
+from .models import Loan
 
 class FundTransferForm(forms.Form):
     recipient_account_number = forms.CharField(label='Recipient Account Number', max_length=10)
     amount = forms.DecimalField(max_digits=12, decimal_places=2, min_value=0.01)
 
-    def clean_recipient_account_number(self):
-        account_number = self.cleaned_data['recipient_account_number']
-        if not Account.objects.filter(account_number=account_number).exists():
-            raise forms.ValidationError("Recipient account does not exist.")
-        return account_number
-
 class DepositWithdrawForm(forms.Form):
     amount = forms.DecimalField(max_digits=12, decimal_places=2, min_value=0.01)
 
 class LoanRequestForm(forms.ModelForm):
     class Meta:
         model = Loan
-        fields = ['amount', 'reason']
\ No newline at end of file
+        fields = ['amount', 'term_months', 'reason']
+
+class LoanApprovalForm(forms.Form):
+    # Managers set the rate when they approve; the customer only asks for amount and term
+    interest_rate = forms.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100)
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import transaction
+
+from . import events, limits, rollups
+from .models import Account, Transaction
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def post(account, transaction_type, amount, description):
+    """
+    Apply a signed amount to an account and record the matching Transaction.
+
+    The account row is locked for the read-modify-write, so concurrent
+    postings can no longer overwrite each other's balance. Debits that would
+    take the balance below zero raise InsufficientFunds, and debits over the
+    account's velocity limit raise limits.VelocityLimitExceeded before any
+    lock is taken.
+    """
+    limit = limits.check(account, transaction_type, amount) if amount < 0 else None
+    with transaction.atomic():
+        locked = Account.objects.select_for_update().get(pk=account.pk)
+        posted = _apply(locked, account, transaction_type, amount, description)
+        _record_usage(account, transaction_type, amount, limit)
+        return posted
+
+
+def transfer(sender, recipient, amount, sent_description, received_description):
+    """
+    Move money between two accounts as a pair of TRANSFER transactions.
+    Both rows are locked in primary-key order so two opposite transfers
+    cannot deadlock each other. Only the sender's velocity limit applies.
+    """
+    limit = limits.check(sender, 'TRANSFER', amount)
+    with transaction.atomic():
+        locked = Account.objects.select_for_update().filter(pk__in=[sender.pk, recipient.pk]).order_by('pk')
+        locked = {acc.pk: acc for acc in locked}
+        _apply(locked[sender.pk], sender, 'TRANSFER', -amount, sent_description)
+        _apply(locked[recipient.pk], recipient, 'TRANSFER', amount, received_description)
+        _record_usage(sender, 'TRANSFER', amount, limit)
+
+
+def _apply(locked, account, transaction_type, amount, description):
+    if amount < 0 and locked.balance + amount < 0:
+        raise InsufficientFunds()
+
+    locked.balance += amount
+    posted = Transaction(
+        account=locked, transaction_type=transaction_type, amount=amount,
+        balance_after=locked.balance, description=description,
+    )
+    # The account save below bumps updated_at itself (see signals.touch_account_on_transaction_change)
+    posted._posted_by_ledger = True
+    posted.save(force_insert=True)
+
+    locked.version += 1
+    locked.last_transaction_id = posted.pk
+    locked.save(update_fields=['balance', 'version', 'last_transaction_id', 'updated_at'])
+    # Keep the caller's instance in step with what was written
+    account.balance = locked.balance
+    account.version = locked.version
+    account.last_transaction_id = locked.last_transaction_id
+
+    rollups.record_transaction(posted)
+    if settings.BANKING_LIVE_UPDATES:
+        events.publish(events.account_channel(locked.pk), {
+            'type': 'transaction',
+            'balance': str(locked.balance),
+            'version': locked.version,
+            'transaction': {
+                'id': posted.pk,
+                'type': posted.transaction_type,
+                'type_display': posted.get_transaction_type_display(),
+                'amount': f'{posted.amount:.2f}',
+                'balance_after': str(posted.balance_after),
+                'description': posted.description,
+                'timestamp': posted.timestamp.isoformat(),
+            },
+        })
+    return posted
+
+
+def _record_usage(account, transaction_type, amount, limit):
+    # Only count money that actually left, i.e. once the posting has committed.
+    # Robust: if the cache is down the money has still moved, so the request
+    # must not fail (and invite a retry) over a missed counter bump.
+    if limit is not None:
+        window = limit[0]
+        transaction.on_commit(lambda: limits.record(account.pk, transaction_type, amount, window), robust=True)
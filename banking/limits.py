@@ -0,0 +1,109 @@
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+
+class VelocityLimitExceeded(Exception):
+    pass
+
+
+def get_limit(account, transaction_type):
+    """
+    Resolve the limit that applies to an account: its own VelocityLimit row
+    wins over a global row (account left empty), which wins over the
+    BANKING_VELOCITY_LIMITS setting. Returns (window_seconds, max_amount,
+    max_count) or None if the transaction type is not limited.
+    """
+    from .models import VelocityLimit
+
+    rows = VelocityLimit.objects.filter(Q(account=account) | Q(account__isnull=True), transaction_type=transaction_type)
+    limit = None
+    for row in rows:
+        if row.account_id is not None or limit is None:
+            limit = row
+    if limit is not None:
+        return limit.window_seconds, limit.max_amount, limit.max_count
+
+    default = getattr(settings, 'BANKING_VELOCITY_LIMITS', {}).get(transaction_type)
+    if default is None:
+        return None
+    max_amount = default.get('max_amount')
+    return default['window'], Decimal(max_amount) if max_amount is not None else None, default.get('max_count')
+
+
+def _keys(account_id, transaction_type, window, now):
+    # Fixed buckets one window wide; the sliding estimate blends the current and previous bucket.
+    bucket = int(now // window)
+    prefix = f'velocity:{account_id}:{transaction_type}:{window}'
+    return bucket, [f'{prefix}:{b}:{field}' for b in (bucket, bucket - 1) for field in ('count', 'cents')]
+
+
+def usage(account_id, transaction_type, window, now=None):
+    """
+    Approximate (count, amount) for the last `window` seconds. This is the
+    sliding-window counter technique: the previous bucket is weighted by
+    how much of it still overlaps the window, so a check is a single
+    get_many of four cache keys no matter how busy the account is.
+    """
+    now = time.time() if now is None else now
+    bucket, keys = _keys(account_id, transaction_type, window, now)
+    values = cache.get_many(keys)
+    count, cents, prev_count, prev_cents = (values.get(key, 0) for key in keys)
+
+    overlap = 1 - (now - bucket * window) / window
+    return count + prev_count * overlap, Decimal(round(cents + prev_cents * overlap)) / 100
+
+
+def record(account_id, transaction_type, amount, window, now=None):
+    now = time.time() if now is None else now
+    _, keys = _keys(account_id, transaction_type, window, now)
+    count_key, cents_key = keys[:2]
+    # Buckets are read for one more window after they close, then expire
+    for key, delta in ((count_key, 1), (cents_key, int(abs(amount) * 100))):
+        cache.add(key, 0, timeout=window * 2)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Evicted between add() and incr(); start the bucket again
+            cache.set(key, delta, timeout=window * 2)
+
+
+def check(account, transaction_type, amount):
+    """
+    Raise VelocityLimitExceeded if moving `amount` out of the account would
+    break its limit for this transaction type. Check and record are not one
+    atomic step, so two requests racing at the boundary can both pass;
+    that is an accepted trade-off for keeping this off the database.
+
+    Returns the limit that was applied (see get_limit) so the caller can
+    record() against the same window once the posting commits.
+    """
+    limit = get_limit(account, transaction_type)
+    if limit is None:
+        return None
+    window, max_amount, max_count = limit
+
+    count, total = usage(account.pk, transaction_type, window)
+    if max_count is not None and count + 1 > max_count:
+        raise VelocityLimitExceeded(
+            f"You have reached the limit of {max_count} {transaction_type.lower()}s per {_describe(window)}. Please try again later."
+        )
+    if max_amount is not None and total + abs(amount) > max_amount:
+        raise VelocityLimitExceeded(
+            f"This would exceed your {transaction_type.lower()} limit of ${max_amount} per {_describe(window)}."
+        )
+    return limit
+
+
+def _describe(window):
+    if window % 86400 == 0:
+        days = window // 86400
+        return 'day' if days == 1 else f'{days} days'
+    if window % 3600 == 0:
+        hours = window // 3600
+        return 'hour' if hours == 1 else f'{hours} hours'
+    minutes = max(window // 60, 1)
+    return 'minute' if minutes == 1 else f'{minutes} minutes'
@@ -0,0 +1,102 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Abs, TruncDay, TruncHour
+from django.utils import timezone
+
+from banking.models import Loan, Transaction, VolumeRollup
+
+TRUNCATE = {'HOUR': TruncHour, 'DAY': TruncDay}
+
+
+def _grouped(queryset, time_field, metric_field=None, metric=None, amount=None):
+    """
+    Yield (granularity, bucket, metric, count, total) for a queryset, using
+    one GROUP BY per granularity.
+    """
+    for granularity, trunc in TRUNCATE.items():
+        group = ['bucket', metric_field] if metric_field else ['bucket']
+        rows = (
+            queryset.order_by()
+            .annotate(bucket=trunc(time_field))
+            .values(*group)
+            .annotate(count=Count('id'), total=Sum(amount or Abs('amount')))
+        )
+        for row in rows:
+            yield granularity, row['bucket'], row[metric_field] if metric_field else metric, row['count'], row['total'] or 0
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hourly and daily volume rollups from the Transaction and Loan tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day to rebuild (YYYY-MM-DD). Defaults to the earliest activity.")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD), inclusive. Defaults to today.")
+        parser.add_argument('--chunk-days', type=int, default=7, help="Days rebuilt per database transaction.")
+
+    def handle(self, *args, **options):
+        first_day = self._parse_day(options['start']) if options['start'] else self._earliest_day()
+        last_day = self._parse_day(options['end']) if options['end'] else timezone.localdate()
+        if first_day is None:
+            self.stdout.write("Nothing to backfill.")
+            return
+
+        # Whole-day chunks, so no daily bucket is ever split between two passes
+        written = 0
+        day = first_day
+        while day <= last_day:
+            chunk_last = min(day + timedelta(days=options['chunk_days'] - 1), last_day)
+            written += self._rebuild(self._midnight(day), self._midnight(chunk_last + timedelta(days=1)))
+            self.stdout.write(f"Rebuilt {day:%Y-%m-%d} to {chunk_last:%Y-%m-%d}.")
+            day = chunk_last + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows."))
+
+    @transaction.atomic
+    def _rebuild(self, start, end):
+        # Rebuilding a range that is still receiving postings can race the
+        # incremental updates; run it for past days or during a quiet period.
+        VolumeRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+
+        transactions = Transaction.objects.filter(timestamp__gte=start, timestamp__lt=end).exclude(
+            transaction_type='TRANSFER', amount__gt=0
+        )
+        loans_requested = Loan.objects.filter(requested_at__gte=start, requested_at__lt=end)
+        loans_processed = Loan.objects.filter(
+            Q(status='APPROVED') | Q(status='DENIED'), processed_at__gte=start, processed_at__lt=end
+        )
+
+        rows = list(_grouped(transactions, 'timestamp', metric_field='transaction_type'))
+        rows += _grouped(loans_requested, 'requested_at', metric='LOAN_REQUESTED', amount='amount')
+        for status in ('APPROVED', 'DENIED'):
+            rows += _grouped(loans_processed.filter(status=status), 'processed_at', metric=f'LOAN_{status}', amount='amount')
+
+        VolumeRollup.objects.bulk_create(
+            [
+                VolumeRollup(granularity=granularity, bucket=bucket, metric=metric, count=count, total=total)
+                for granularity, bucket, metric, count, total in rows
+            ],
+            batch_size=1000,
+        )
+        return len(rows)
+
+    def _parse_day(self, value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+    def _midnight(self, day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def _earliest_day(self):
+        earliest = [
+            Transaction.objects.aggregate(first=Min('timestamp'))['first'],
+            Loan.objects.aggregate(first=Min('requested_at'))['first'],
+        ]
+        earliest = [value for value in earliest if value is not None]
+        if not earliest:
+            return None
+        return timezone.localdate(min(earliest))
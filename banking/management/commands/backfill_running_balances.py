@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from banking.models import Account, Transaction
+
+
+class Command(BaseCommand):
+    help = "Fill in Transaction.balance_after for rows posted before running balances were recorded."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per bulk update.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        account_ids = (
+            Transaction.objects.filter(balance_after__isnull=True)
+            .order_by('account_id').values_list('account_id', flat=True).distinct()
+        )
+
+        accounts = rows = 0
+        for account_id in account_ids.iterator():
+            rows += self._backfill_account(account_id, batch_size)
+            accounts += 1
+            if accounts % 1000 == 0:
+                self.stdout.write(f"{accounts} accounts done ({rows} rows updated).")
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {rows} transactions across {accounts} accounts."))
+
+    def _backfill_account(self, account_id, batch_size):
+        # Lock the account so no new posting lands while its history is rewritten
+        with transaction.atomic():
+            Account.objects.select_for_update().filter(pk=account_id).first()
+            history = (
+                Transaction.objects.filter(account_id=account_id)
+                .order_by('timestamp', 'id').only('id', 'amount', 'balance_after')
+            )
+
+            running = 0
+            updated = 0
+            batch = []
+            for tx in history.iterator(chunk_size=batch_size):
+                running += tx.amount
+                if tx.balance_after != running:
+                    tx.balance_after = running
+                    batch.append(tx)
+                if len(batch) >= batch_size:
+                    Transaction.objects.bulk_update(batch, ['balance_after'])
+                    updated += len(batch)
+                    batch = []
+            if batch:
+                Transaction.objects.bulk_update(batch, ['balance_after'])
+                updated += len(batch)
+            return updated
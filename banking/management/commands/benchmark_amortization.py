@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from banking import amortization
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the amortization engine on a synthetic loan book and check the portfolio "
+        "totals against per-loan schedules. Never touches the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loans', type=int, default=100_000, help="Number of loans in the book.")
+        parser.add_argument('--max-term', type=int, default=360, help="Terms are drawn from 1 to this many months.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n = options['loans']
+        # Same shapes the Loan model allows: cents, rates to two decimals, whole-month terms
+        principal = rng.integers(100_000, 10_000_000, n) / 100
+        rate = rng.integers(0, 2500, n) / 100
+        term = rng.integers(1, options['max_term'] + 1, n)
+        paid = rng.integers(0, term + 1)
+
+        timings = {}
+
+        def timed(label, func):
+            func()  # warm up
+            start = time.perf_counter()
+            result = func()
+            timings[label] = time.perf_counter() - start
+            return result
+
+        timed('monthly_payment', lambda: amortization.monthly_payment(principal, rate, term))
+        timed('remaining_balance', lambda: amortization.remaining_balance(principal, rate, term, paid))
+        flows = timed('portfolio_cashflows', lambda: amortization.portfolio_cashflows(principal, rate, term, paid))
+
+        def all_schedules():
+            # What a consumer of the full schedules does: walk every chunk
+            total = 0.0
+            for _, chunk in amortization.iter_schedule(principal, rate, term):
+                total += chunk['interest'].sum()
+            return total
+
+        scheduled_interest = timed('iter_schedule', all_schedules)
+
+        self.stdout.write(f"{n:,} loans, terms 1-{options['max_term']} months")
+        for label, seconds in timings.items():
+            self.stdout.write(f"  {label:<22}{seconds * 1000:>9.1f} ms")
+
+        # Every loan's full schedule, with nothing paid yet, has to add up to
+        # the portfolio view of the same book
+        totals = amortization.portfolio_cashflows(principal, rate, term)
+        difference = abs(totals['interest'].sum() - scheduled_interest)
+        style = self.style.SUCCESS if difference < 0.01 else self.style.ERROR
+        self.stdout.write(style(f"Total interest, portfolio vs per-loan schedules: off by {difference:.6f}"))
+        self.stdout.write(f"Outstanding after next payment: {flows['outstanding'][0]:,.2f}")
@@ -0,0 +1,160 @@
+import random
+import sqlite3
+import time
+from decimal import Context, Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+from django.db.models import Count, Sum
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from banking.fields import MoneyField
+
+TIMED = ('sum', 'group_by', 'convert', 'index', 'range')
+ORM_TIMED = ('sum', 'group_by', 'fetch', 'range')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DECIMAL and integer minor-unit storage for ledger-style queries, first as raw SQL "
+        "on an in-memory SQLite database, then through the ORM (where values are converted to "
+        "Decimal) on a throwaway test database. Never touches the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Number of transactions to generate.")
+        parser.add_argument('--orm-rows', type=int, default=200_000, help="Number of transactions for the ORM comparison.")
+        parser.add_argument('--accounts', type=int, default=10_000, help="Number of distinct accounts.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Amounts in cents, both signs, like deposits and withdrawals
+        rows = [(rng.randrange(options['accounts']), rng.randint(-50_000, 100_000)) for _ in range(options['rows'])]
+        self._raw(rows, options)
+        self._orm(rows[:options['orm_rows']], options)
+
+    def _raw(self, rows, options):
+        exact_total = sum(cents for _, cents in rows)
+
+        db = sqlite3.connect(':memory:')
+        # Same column types Django creates: DecimalField -> "decimal", MoneyField -> "bigint"
+        db.execute('CREATE TABLE tx_decimal (account_id integer, amount decimal NOT NULL)')
+        db.execute('CREATE TABLE tx_minor (account_id integer, amount bigint NOT NULL)')
+        # Django's SQLite backend binds Decimals as strings
+        db.executemany('INSERT INTO tx_decimal VALUES (?, ?)', ((a, str(Decimal(c).scaleb(-2))) for a, c in rows))
+        db.executemany('INSERT INTO tx_minor VALUES (?, ?)', rows)
+        db.commit()
+
+        decimal_context = Context(prec=12)
+        quantum = Decimal('0.01')
+        money = MoneyField()
+
+        def from_decimal(value):
+            # What Django's SQLite DecimalField converter does to every value
+            return decimal_context.create_decimal_from_float(value).quantize(quantum, context=decimal_context)
+
+        def from_minor(value):
+            return money.from_db_value(value, None, None)
+
+        results = []
+        for label, table, convert in (('DECIMAL', 'tx_decimal', from_decimal), ('BIGINT cents', 'tx_minor', from_minor)):
+            timings = {}
+
+            start = time.perf_counter()
+            total = db.execute(f'SELECT SUM(amount) FROM {table}').fetchone()[0]
+            timings['sum'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            grouped = db.execute(f'SELECT account_id, SUM(amount) FROM {table} GROUP BY account_id').fetchall()
+            timings['group_by'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _, value in grouped:
+                convert(value)
+            timings['convert'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            db.execute(f'CREATE INDEX {table}_amount ON {table} (amount)')
+            timings['index'] = time.perf_counter() - start
+
+            low, high = (Decimal('100.00'), Decimal('200.00')) if table == 'tx_decimal' else (10_000, 20_000)
+            start = time.perf_counter()
+            for _ in range(100):
+                db.execute(f'SELECT COUNT(*) FROM {table} WHERE amount BETWEEN ? AND ?', (str(low), str(high)) if table == 'tx_decimal' else (low, high)).fetchone()
+            timings['range'] = (time.perf_counter() - start) / 100
+
+            # REAL sums come back as floats, integer sums as exact cents
+            exact = total == exact_total if table == 'tx_minor' else Decimal(repr(total)) == Decimal(exact_total).scaleb(-2)
+            results.append((label, timings, total, exact))
+
+        self.stdout.write(f"Raw SQL: {len(rows):,} rows over {options['accounts']:,} accounts (times in ms)\n")
+        self.stdout.write(f"{'storage':<14}{'SUM':>10}{'GROUP BY':>10}{'convert':>10}{'index':>10}{'range':>10}  exact SUM")
+        for label, timings, total, exact in results:
+            self.stdout.write(
+                f"{label:<14}" + ''.join(f"{timings[key] * 1000:>10.1f}" for key in TIMED)
+                + f"  {'yes' if exact else 'no (' + repr(total) + ')'}"
+            )
+        self._verdict(results[0][1], results[1][1], {'sum': 'SUM', 'group_by': 'GROUP BY', 'convert': 'convert', 'index': 'index', 'range': 'range'})
+
+    def _orm(self, rows, options):
+        # The same comparison through querysets, so the Decimal conversion
+        # Django does for each field type is part of every timing
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = [self._orm_timings(label, field, rows) for label, field in (
+                ('DECIMAL', lambda: models.DecimalField(max_digits=12, decimal_places=2)),
+                ('BIGINT cents', lambda: MoneyField()),
+            )]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"\nORM on {connection.vendor}: {len(rows):,} rows over {options['accounts']:,} accounts (times in ms)\n")
+        self.stdout.write(f"{'storage':<14}{'SUM':>10}{'GROUP BY':>10}{'fetch':>10}{'range':>10}")
+        for label, timings in results:
+            self.stdout.write(f"{label:<14}" + ''.join(f"{timings[key] * 1000:>10.1f}" for key in ORM_TIMED))
+        self._verdict(results[0][1], results[1][1], {'sum': 'ORM SUM', 'group_by': 'ORM GROUP BY', 'fetch': 'ORM fetch', 'range': 'ORM range'})
+
+    def _orm_timings(self, label, field, rows):
+        # Built here rather than at import time so they never show up in migrations
+        model = type(f"MoneyBenchmark{label.split()[0].title()}", (models.Model,), {
+            '__module__': __name__,
+            'account_id': models.IntegerField(),
+            'amount': field(),
+            'Meta': type('Meta', (), {'app_label': 'banking', 'managed': False}),
+        })
+        with connection.schema_editor() as editor:
+            editor.create_model(model)
+        model.objects.bulk_create((model(account_id=a, amount=Decimal(c).scaleb(-2)) for a, c in rows), batch_size=5000)
+
+        timings = {}
+
+        start = time.perf_counter()
+        model.objects.aggregate(total=Sum('amount'))
+        timings['sum'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        list(model.objects.values('account_id').annotate(total=Sum('amount')).order_by())
+        timings['group_by'] = time.perf_counter() - start
+
+        # Reading rows back, like a statement page does
+        start = time.perf_counter()
+        list(model.objects.values_list('amount', flat=True))
+        timings['fetch'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(20):
+            model.objects.filter(amount__range=(Decimal('100.00'), Decimal('200.00'))).aggregate(n=Count('pk'))
+        timings['range'] = (time.perf_counter() - start) / 20
+        return label, timings
+
+    def _verdict(self, decimal, minor, labels):
+        # Say plainly where integer cents lose, not just where they win
+        slower = [f"{name} {minor[key] / decimal[key]:.2f}x" for key, name in labels.items() if minor[key] > decimal[key]]
+        faster = [f"{name} {decimal[key] / minor[key]:.2f}x" for key, name in labels.items() if minor[key] <= decimal[key]]
+        if slower:
+            self.stdout.write(self.style.WARNING(f"BIGINT cents slower than DECIMAL: {', '.join(slower)}"))
+        if faster:
+            self.stdout.write(f"BIGINT cents faster than DECIMAL: {', '.join(faster)}")
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from banking import ledger
+from banking.urls import urlpatterns
+
+# Each mode is (SESSION_ENGINE, MESSAGE_STORAGE); 'db' is Django's out-of-the-box setup
+MODES = {
+    'db': ('django.contrib.sessions.backends.db', 'django.contrib.messages.storage.fallback.FallbackStorage'),
+    'cached_db': ('django.contrib.sessions.backends.cached_db', 'django.contrib.messages.storage.cookie.CookieStorage'),
+    'cache': ('django.contrib.sessions.backends.cache', 'django.contrib.messages.storage.cookie.CookieStorage'),
+    'signed_cookies': ('django.contrib.sessions.backends.signed_cookies', 'django.contrib.messages.storage.cookie.CookieStorage'),
+}
+
+# Streams never finish, and these change state on GET
+SKIP = {'customer_events', 'manager_events', 'approve_user', 'toggle_freeze_account', 'process_loan'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Count database queries per page in banking/urls.py under each session mode. "
+        "Runs against a throwaway test database, never the configured one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = {mode: self._measure(*MODES[mode]) for mode in options['modes']}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write("Queries per request, steady state (of which django_session)\n")
+        self.stdout.write(f"{'page':<34}" + ''.join(f"{mode:>16}" for mode in results))
+        first = next(iter(results.values()))
+        for page in first:
+            self.stdout.write(f"{page:<34}" + ''.join(f"{self._cell(results[mode][page]):>16}" for mode in results))
+        totals = {mode: tuple(sum(counts) for counts in zip(*results[mode].values())) for mode in results}
+        self.stdout.write(f"{'total':<34}" + ''.join(f"{self._cell(totals[mode]):>16}" for mode in results))
+
+    def _cell(self, counts):
+        return f"{counts[0]} ({counts[1]})"
+
+    def _measure(self, session_engine, message_storage):
+        from accounts.models import CustomUser
+
+        with override_settings(SESSION_ENGINE=session_engine, MESSAGE_STORAGE=message_storage):
+            manager = CustomUser.objects.create_user('bench-manager', password='unused', is_staff=True)
+            customer = CustomUser.objects.create_user('bench-customer', password='unused', first_name='Bench', last_name='Customer', is_approved=True)
+            payee = CustomUser.objects.create_user('bench-payee', password='unused', is_approved=True)
+            ledger.post(customer.account, 'DEPOSIT', 100, 'Benchmark seed')
+            try:
+                return self._run(manager, customer, payee)
+            finally:
+                # Every mode starts from the same data
+                CustomUser.objects.filter(pk__in=[manager.pk, customer.pk, payee.pk]).delete()
+
+    def _run(self, manager, customer, payee):
+        customer_client, manager_client = Client(), Client()
+        customer_client.force_login(customer)
+        manager_client.force_login(manager)
+        url_kwargs = {'user_id': customer.pk}
+
+        requests = []
+        for pattern in urlpatterns:
+            if pattern.name in SKIP or not set(pattern.pattern.converters) <= set(url_kwargs):
+                continue
+            kwargs = {name: url_kwargs[name] for name in pattern.pattern.converters}
+            client = manager_client if str(pattern.pattern).startswith('manager/') else customer_client
+            data = {'account_number': payee.account.account_number} if pattern.name == 'api_recipient_preview' else None
+            requests.append((pattern.name, lambda c=client, u=reverse(pattern.name, kwargs=kwargs), d=data: c.get(u, d)))
+        # One write that also leaves a flash message behind
+        requests.append(('deposit_money (POST)', lambda: customer_client.post(reverse('deposit_money'), {'amount': '1.00'})))
+
+        counts = {}
+        for name, send in requests:
+            # The first hit warms caches (cached_db's session copy among them)
+            send()
+            with CaptureQueriesContext(connection) as captured:
+                send()
+            session_queries = sum('django_session' in query['sql'] for query in captured.captured_queries)
+            counts[name] = (len(captured), session_queries)
+        return counts
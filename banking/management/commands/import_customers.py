@@ -0,0 +1,224 @@
+import csv
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from accounts.models import CustomUser
+from banking.customer_import import allocate_account_numbers, hash_passwords, init_worker
+from banking.models import Account, Transaction
+
+OPENING_DESCRIPTION = "Opening balance migrated from legacy system"
+
+
+class Command(BaseCommand):
+    help = (
+        "Import approved customers from a CSV export with columns username, password and optionally "
+        "email, first_name, last_name, opening_balance and account_number. Restartable: progress is "
+        "checkpointed after every committed batch and rows whose username already exists are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="CSV file to import.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Customers per database transaction.")
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help="Password hashing processes.")
+        parser.add_argument('--checkpoint', help="Checkpoint file (default: <csv_path>.checkpoint).")
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start from the first row.")
+
+    def handle(self, *args, **options):
+        checkpoint_path = options['checkpoint'] or f"{options['csv_path']}.checkpoint"
+        done = 0
+        if os.path.exists(checkpoint_path) and not options['restart']:
+            with open(checkpoint_path) as f:
+                done = json.load(f)['rows']
+            self.stdout.write(f"Resuming after row {done} from {checkpoint_path}.")
+
+        self.imported = self.skipped = self.failed = 0
+        rows = done
+
+        with open(options['csv_path'], newline='', encoding='utf-8-sig') as source:
+            reader = csv.DictReader(source)
+            missing = {'username', 'password'} - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+
+            for batch_end, batch, hashes in self._hashed_batches(reader, done, options['batch_size'], options['workers']):
+                self._write_batch(batch, hashes)
+                rows = batch_end
+                self._save_checkpoint(checkpoint_path, rows)
+                self.stdout.write(f"{rows} rows processed ({self.imported} imported, {self.skipped} skipped, {self.failed} failed).")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {self.imported} customers imported, {self.skipped} already present, {self.failed} rejected. "
+            "Run backfill_rollups to include the opening balances in manager analytics."
+        ))
+
+    def _batches(self, reader, done, batch_size):
+        # Yields (row number of the batch's last row, validated rows), skipping what a previous run committed
+        batch = []
+        line = 0
+        for line, row in enumerate(reader, start=1):
+            if line <= done:
+                continue
+            parsed = self._parse(line, row)
+            if parsed is not None:
+                batch.append(parsed)
+            if line % batch_size == 0:
+                yield line, self._drop_existing(batch)
+                batch = []
+        if line > done and line % batch_size:
+            yield line, self._drop_existing(batch)
+
+    def _hashed_batches(self, reader, done, batch_size, workers):
+        batches = self._batches(reader, done, batch_size)
+        if workers <= 1:
+            for batch_end, batch in batches:
+                yield batch_end, batch, hash_passwords([row['password'] for row in batch])
+            return
+
+        # Hashing dominates, so keep the pool busy with the next batch while
+        # the current one is being written
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        chunk = max(1, batch_size // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as pool:
+            pending = deque()
+            for batch_end, batch in batches:
+                passwords = [row['password'] for row in batch]
+                futures = [pool.submit(hash_passwords, passwords[i:i + chunk]) for i in range(0, len(passwords), chunk)]
+                pending.append((batch_end, batch, futures))
+                if len(pending) > 1:
+                    yield self._collect(pending.popleft())
+            while pending:
+                yield self._collect(pending.popleft())
+
+    def _collect(self, item):
+        batch_end, batch, futures = item
+        return batch_end, batch, [hashed for future in futures for hashed in future.result()]
+
+    def _parse(self, line, row):
+        username = (row.get('username') or '').strip()
+        password = row.get('password') or ''
+        if not username or not password:
+            return self._reject(line, "username and password are required")
+
+        try:
+            opening_balance = Decimal((row.get('opening_balance') or '0').strip())
+        except InvalidOperation:
+            return self._reject(line, f"invalid opening_balance {row.get('opening_balance')!r}")
+        if opening_balance < 0 or opening_balance != opening_balance.quantize(Decimal('0.01')):
+            return self._reject(line, f"opening_balance must be a non-negative amount in cents, got {opening_balance}")
+
+        account_number = (row.get('account_number') or '').strip()
+        if account_number and (len(account_number) > 10 or not account_number.isdigit()):
+            return self._reject(line, f"invalid account_number {account_number!r}")
+
+        return {
+            'line': line,
+            'username': username,
+            'password': password,
+            'email': (row.get('email') or '').strip(),
+            'first_name': (row.get('first_name') or '').strip(),
+            'last_name': (row.get('last_name') or '').strip(),
+            'opening_balance': opening_balance,
+            'account_number': account_number,
+        }
+
+    def _reject(self, line, reason):
+        self.failed += 1
+        self.stderr.write(f"Row {line}: {reason}; skipped.")
+        return None
+
+    def _drop_existing(self, batch):
+        # Makes a rerun safe even if the checkpoint lags the last committed batch
+        existing = set(CustomUser.objects.filter(username__in=[row['username'] for row in batch]).values_list('username', flat=True))
+        seen = set()
+        kept = []
+        for row in batch:
+            if row['username'] in existing or row['username'] in seen:
+                self.skipped += 1
+            else:
+                seen.add(row['username'])
+                kept.append(row)
+        return kept
+
+    @transaction.atomic
+    def _write_batch(self, batch, hashes):
+        if not batch:
+            return
+
+        # Batches are checked for existing usernames one batch ahead of being
+        # written, so look again for anything the previous batch just added
+        existing = set(CustomUser.objects.filter(username__in=[row['username'] for row in batch]).values_list('username', flat=True))
+        wanted = [row['account_number'] for row in batch if row['account_number']]
+        clashes = set(Account.objects.filter(account_number__in=wanted).values_list('account_number', flat=True))
+        kept = []
+        for row, hashed in zip(batch, hashes):
+            if row['username'] in existing:
+                self.skipped += 1
+            elif row['account_number'] in clashes:
+                self._reject(row['line'], f"account_number {row['account_number']} is already in use")
+            else:
+                if row['account_number']:
+                    clashes.add(row['account_number'])
+                kept.append((row, hashed))
+        if not kept:
+            return
+        fresh = iter(allocate_account_numbers(sum(1 for row, _ in kept if not row['account_number']), taken=wanted))
+
+        # bulk_create skips the post_save signals, including the one that
+        # would otherwise create an Account per approved user
+        users = CustomUser.objects.bulk_create([
+            CustomUser(
+                username=row['username'], password=hashed, email=row['email'],
+                first_name=row['first_name'], last_name=row['last_name'], is_approved=True,
+            )
+            for row, hashed in kept
+        ])
+        if users[0].pk is None:
+            # Backends that can't return ids from a bulk insert
+            ids = dict(CustomUser.objects.filter(username__in=[user.username for user in users]).values_list('username', 'pk'))
+            for user in users:
+                user.pk = ids[user.username]
+
+        accounts = Account.objects.bulk_create([
+            Account(
+                user=user, account_number=row['account_number'] or next(fresh),
+                balance=row['opening_balance'], version=1 if row['opening_balance'] else 0,
+            )
+            for user, (row, _) in zip(users, kept)
+        ])
+        if accounts[0].pk is None:
+            ids = dict(Account.objects.filter(user__in=users).values_list('user_id', 'pk'))
+            for account in accounts:
+                account.pk = ids[account.user_id]
+
+        funded = [account for account in accounts if account.balance]
+        openings = Transaction.objects.bulk_create([
+            Transaction(
+                account=account, transaction_type='DEPOSIT', amount=account.balance,
+                balance_after=account.balance, description=OPENING_DESCRIPTION,
+            )
+            for account in funded
+        ])
+        if openings and openings[0].pk is None:
+            ids = dict(Transaction.objects.filter(account__in=funded).values_list('account_id', 'pk'))
+            for account in funded:
+                account.last_transaction_id = ids[account.pk]
+        else:
+            for account, opening in zip(funded, openings):
+                account.last_transaction_id = opening.pk
+        Account.objects.bulk_update(funded, ['last_transaction_id'])
+
+        self.imported += len(kept)
+
+    def _save_checkpoint(self, path, rows):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({'rows': rows}, f)
+        os.replace(f'{path}.tmp', path)
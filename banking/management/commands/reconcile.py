@@ -0,0 +1,96 @@
+import csv
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from banking.models import Account, ReconciliationRun
+from banking.reconciliation import check_range, init_worker, repair_account
+
+
+class Command(BaseCommand):
+    help = "Check every account balance against the sum of its transactions and report any differences."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--report', default='reconciliation_report.csv', help="CSV file to write mismatches to.")
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help="Number of worker processes.")
+        parser.add_argument('--chunk-size', type=int, default=10000, help="Number of account ids per work unit.")
+        parser.add_argument('--full', action='store_true', help="Recheck all accounts, not just those touched since the last run.")
+        parser.add_argument('--repair', action='store_true', help="Reset mismatched balances to the ledger total.")
+        parser.add_argument(
+            '--quick', action='store_true',
+            help="Compare against the running balance on each account's latest transaction instead of summing its history "
+                 "(run backfill_running_balances first on older data).",
+        )
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+
+        since = None
+        recheck = []
+        if not options['full']:
+            last_run = ReconciliationRun.objects.filter(finished_at__isnull=False).first()
+            if last_run:
+                since = last_run.started_at
+                recheck = last_run.unresolved
+
+        accounts = Account.objects.all()
+        if since is not None:
+            accounts = accounts.filter(Q(updated_at__gte=since) | Q(id__in=recheck))
+            self.stdout.write(
+                f"Incremental run: checking accounts touched since {since:%Y-%m-%d %H:%M:%S}"
+                f" and {len(recheck)} left unresolved by the last run."
+            )
+        bounds = accounts.aggregate(low=Min('id'), high=Max('id'))
+
+        ranges = []
+        if bounds['low'] is not None:
+            ranges = [(low, low + options['chunk_size']) for low in range(bounds['low'], bounds['high'] + 1, options['chunk_size'])]
+
+        run = ReconciliationRun.objects.create(started_at=started_at, incremental=since is not None, report_path=options['report'])
+
+        with open(options['report'], 'w', newline='') as report:
+            writer = csv.writer(report)
+            # Quick mode never sums the ledger, it compares against the latest running balance
+            expected = 'latest_balance_after' if options['quick'] else 'ledger_total'
+            writer.writerow(['account_id', 'account_number', 'balance', expected, 'difference', 'repaired'])
+
+            for checked, mismatches in self._run_ranges(ranges, since, recheck, options['quick'], options['workers']):
+                run.accounts_checked += checked
+                for account_id, account_number, balance, ledger_total in mismatches:
+                    repaired = options['repair'] and repair_account(account_id)
+                    writer.writerow([account_id, account_number, balance, ledger_total, balance - ledger_total, repaired])
+                    run.mismatches += 1
+                    run.repaired += int(repaired)
+                    if not repaired:
+                        run.unresolved.append(account_id)
+                # Flush as we go so a long run can be followed with `tail -f`
+                report.flush()
+
+        run.finished_at = timezone.now()
+        run.save()
+
+        style = self.style.SUCCESS if run.mismatches == 0 else self.style.WARNING
+        self.stdout.write(style(
+            f"Checked {run.accounts_checked} accounts: {run.mismatches} mismatches, {run.repaired} repaired. "
+            f"Report written to {options['report']}."
+        ))
+
+    def _run_ranges(self, ranges, since, recheck, quick, workers):
+        # Each work unit only gets the carried-over ids that fall in its range
+        work = [(low, high, since, quick, [i for i in recheck if low <= i < high]) for low, high in ranges]
+        if workers <= 1 or len(work) <= 1:
+            for args in work:
+                yield check_range(*args)
+            return
+
+        # Don't hand our open connection over to the pool
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as pool:
+            futures = [pool.submit(check_range, *args) for args in work]
+            for future in as_completed(futures):
+                yield future.result()
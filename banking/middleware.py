@@ -0,0 +1,140 @@
+import hashlib
+import math
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+# Token-bucket throttling for the endpoints people hammer: credential stuffing
+# against login, scripted transfers. Limits are per URL name (RATE_LIMITS) and
+# checked in process_view, so a throttled request never reaches the view, the
+# login form's password hashing, or the ledger.
+
+
+def take(key, capacity, period, now=None):
+    """
+    Take one token from the bucket `key`, which holds `capacity` tokens and
+    refills completely over `period` seconds. Returns 0 if a token was
+    available, otherwise the number of seconds until one will be.
+
+    The bucket is two cache keys: when it was started, and how many tokens
+    have been taken since, bumped with an atomic incr. Tokens left is then
+    capacity - (taken - refilled). Both keys expire once the bucket would be
+    full again, so the next request starts a fresh one and idle time never
+    banks more than `capacity` tokens. Racing requests can let a token or two
+    too many through; nothing here touches the database.
+    """
+    now = time.time() if now is None else now
+    rate = capacity / period
+    start_key = f'ratelimit:{key}'
+    start_ms = int(now * 1000)
+    if not cache.add(start_key, start_ms, timeout=period):
+        start_ms = cache.get(start_key, start_ms)
+
+    count_key = f'{start_key}:{start_ms}'
+    cache.add(count_key, 0, timeout=period)
+    try:
+        taken = cache.incr(count_key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(count_key, 1, timeout=period)
+        taken = 1
+
+    debt = taken - (now - start_ms / 1000) * rate
+    if debt > capacity:
+        # A refused request doesn't spend a token
+        try:
+            cache.decr(count_key)
+        except ValueError:
+            pass
+        return (debt - capacity) / rate
+
+    ttl = max(math.ceil(debt / rate), 1)
+    cache.touch(start_key, ttl)
+    cache.touch(count_key, ttl)
+    return 0
+
+
+def client_ip(request):
+    # Only the addresses appended by our own proxies can be trusted; anything
+    # further left in X-Forwarded-For is whatever the client chose to send.
+    depth = getattr(settings, 'RATE_LIMIT_PROXY_DEPTH', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if depth and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',')]
+        return hops[-min(depth, len(hops))]
+    return request.META.get('REMOTE_ADDR')
+
+
+def _user_key(request, url_name):
+    if url_name == 'login':
+        # Nobody is logged in yet; throttle guesses against the account being attacked
+        username = request.POST.get('username', '').strip().lower()
+    else:
+        # The session cookie stands in for the user. Loading the session (a
+        # django_session query with database sessions) or request.user would
+        # be database work before the 429. Each extra session costs a login,
+        # which is throttled in turn.
+        username = request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+    return hashlib.sha256(username.encode()).hexdigest()[:32] if username else None
+
+
+class RateLimitMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limits = getattr(settings, 'RATE_LIMITS', {})
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django only wraps a sync process_view in a thread; requests
+            # nobody limits shouldn't pay for that hop
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def _config(self, request):
+        match = request.resolver_match
+        config = self.limits.get(match.url_name) if match is not None else None
+        if config is None or request.method not in config.get('methods', (request.method,)):
+            return match, None
+        return match, config
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match, config = self._config(request)
+        return self._check(request, match, config) if config is not None else None
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        match, config = self._config(request)
+        return await sync_to_async(self._check)(request, match, config) if config is not None else None
+
+    def _check(self, request, match, config):
+        for scope, identify in (('ip', lambda: client_ip(request)), ('user', lambda: _user_key(request, match.url_name))):
+            if scope not in config:
+                continue
+            ident = identify()
+            if ident is None:
+                continue
+            capacity, period = config[scope]
+            wait = take(f'{match.url_name}:{scope}:{ident}', capacity, period)
+            if wait:
+                return self._throttled(match, wait)
+        return None
+
+    def _throttled(self, match, wait):
+        detail = 'Too many requests. Please try again later.'
+        if match.url_name.startswith('api_'):
+            response = JsonResponse({'detail': detail}, status=429)
+        else:
+            response = HttpResponse(detail, status=429, content_type='text/plain')
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:16
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0002_loan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='interest_rate',
+            field=models.DecimalField(decimal_places=2, default=5.0, help_text='Annual interest rate in percent.', max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='loan',
+            name='term_months',
+            field=models.PositiveIntegerField(default=12, help_text='Repayment period in months.', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(360)]),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0003_loan_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('incremental', models.BooleanField(default=False)),
+                ('accounts_checked', models.PositiveIntegerField(default=0)),
+                ('mismatches', models.PositiveIntegerField(default=0)),
+                ('repaired', models.PositiveIntegerField(default=0)),
+                ('report_path', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0004_reconciliation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VelocityLimit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('TRANSFER', 'Transfer'), ('WITHDRAWAL', 'Withdrawal')], max_length=10)),
+                ('window_seconds', models.PositiveIntegerField(default=3600)),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='velocity_limits', to='banking.account')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'transaction_type'), name='unique_velocity_limit_per_account')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def set_last_transaction(apps, schema_editor):
+    Account = apps.get_model('banking', 'Account')
+    Transaction = apps.get_model('banking', 'Transaction')
+    latest = Transaction.objects.filter(account=OuterRef('pk')).order_by('-id').values('id')[:1]
+    Account.objects.update(last_transaction_id=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0005_velocity_limits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='last_transaction_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(set_last_transaction, migrations.RunPython.noop),
+    ]
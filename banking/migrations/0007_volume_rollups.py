@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0006_account_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolumeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('HOUR', 'Hourly'), ('DAY', 'Daily')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('metric', models.CharField(choices=[('DEPOSIT', 'Deposit'), ('WITHDRAWAL', 'Withdrawal'), ('TRANSFER', 'Transfer'), ('LOAN_REQUESTED', 'Loan requested'), ('LOAN_APPROVED', 'Loan approved'), ('LOAN_DENIED', 'Loan denied')], max_length=16)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'bucket', 'metric'), name='unique_rollup_bucket')],
+            },
+        ),
+    ]
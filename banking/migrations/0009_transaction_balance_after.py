@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0008_audit_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+    ]
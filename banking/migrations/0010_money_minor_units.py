@@ -0,0 +1,99 @@
+# Moves the ledger's money columns from DECIMAL to BIGINT cents.
+#
+# Each column is copied into a new integer column with a single UPDATE
+# (ROUND(value * 100)), the old column is dropped and the new one takes its
+# name. Going backwards does the same in reverse.
+
+import banking.fields
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Cast, Round
+
+MONEY_FIELDS = [
+    ('Account', 'balance'),
+    ('Transaction', 'amount'),
+    ('Transaction', 'balance_after'),
+]
+
+
+def to_minor_units(apps, schema_editor):
+    for model_name, field in MONEY_FIELDS:
+        model = apps.get_model('banking', model_name)
+        model.objects.update(**{
+            f'{field}_minor': Cast(Round(F(field) * Value(100)), models.BigIntegerField())
+        })
+
+
+def from_minor_units(apps, schema_editor):
+    for model_name, field in MONEY_FIELDS:
+        model = apps.get_model('banking', model_name)
+        model.objects.update(**{
+            field: Cast(F(f'{field}_minor') * Value(Decimal('0.01')), models.DecimalField(max_digits=12, decimal_places=2))
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0009_transaction_balance_after'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='balance_minor',
+            field=banking.fields.MoneyField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='amount_minor',
+            field=banking.fields.MoneyField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='balance_after_minor',
+            field=banking.fields.MoneyField(blank=True, null=True),
+        ),
+        # Reversing re-adds the old DECIMAL columns as nullable; they are filled
+        # by from_minor_units before the integer columns are dropped.
+        migrations.AlterField(
+            model_name='account',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=12, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.RunPython(to_minor_units, from_minor_units),
+        migrations.RemoveField(
+            model_name='account',
+            name='balance',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='balance_after',
+        ),
+        migrations.RenameField(
+            model_name='account',
+            old_name='balance_minor',
+            new_name='balance',
+        ),
+        migrations.RenameField(
+            model_name='transaction',
+            old_name='amount_minor',
+            new_name='amount',
+        ),
+        migrations.RenameField(
+            model_name='transaction',
+            old_name='balance_after_minor',
+            new_name='balance_after',
+        ),
+    ]
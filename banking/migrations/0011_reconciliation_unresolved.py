@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0010_money_minor_units'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reconciliationrun',
+            name='unresolved',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
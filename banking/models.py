@@ -1,14 +1,24 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+from .fields import MoneyField
 import uuid
 
 # Create your models here.
 class Account(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='account')
     account_number = models.CharField(max_length=10, unique=True, editable=False)
-    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    balance = MoneyField(default=0)
     is_frozen = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every save, lets reconciliation only recheck accounts touched since its last run
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Maintained by the ledger on every posting, so clients can tell whether
+    # anything changed without looking at the transactions table
+    version = models.PositiveIntegerField(default=0)
+    last_transaction_id = models.BigIntegerField(null=True, blank=True, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.account_number:
@@ -23,6 +33,14 @@ class Account(models.Model):
         return f"{self.user.username}'s Account ({self.account_number})"
 
 
+class TransactionQuerySet(models.QuerySet):
+    def delete(self):
+        # Same reason as Transaction.delete(), one UPDATE for all the affected accounts
+        with transaction.atomic(using=self.db):
+            Account.objects.filter(pk__in=self.values('account_id')).update(updated_at=timezone.now())
+            return super().delete()
+
+
 class Transaction(models.Model):
     TRANSACTION_TYPES = (
         ('DEPOSIT', 'Deposit'),
@@ -31,13 +49,24 @@ class Transaction(models.Model):
     )
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='transactions')
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
-    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    amount = MoneyField()
+    # Account balance right after this posting, written by the ledger under the account lock
+    balance_after = MoneyField(null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
     description = models.CharField(max_length=255)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         ordering = ['-timestamp']
 
+    def delete(self, *args, **kwargs):
+        # Touch the account so incremental reconciliation rechecks it. Done
+        # here rather than in a post_delete receiver, which would stop Django
+        # from fast-deleting the transactions of a removed account or user.
+        Account.objects.filter(pk=self.account_id).update(updated_at=timezone.now())
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"{self.transaction_type} of {self.amount} for {self.account.account_number}"
 
@@ -50,6 +79,8 @@ class Loan(models.Model):
     )
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='loans')
     amount = models.DecimalField(max_digits=12, decimal_places=2)
+    interest_rate = models.DecimalField(max_digits=5, decimal_places=2, default=5.00, help_text='Annual interest rate in percent.')
+    term_months = models.PositiveIntegerField(default=12, validators=[MinValueValidator(1), MaxValueValidator(360)], help_text='Repayment period in months.')
     reason = models.TextField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     requested_at = models.DateTimeField(auto_now_add=True)
@@ -57,3 +88,106 @@ class Loan(models.Model):
 
     def __str__(self):
         return f"Loan request of ${self.amount} by {self.user.username}"
+
+
+
+class VolumeRollup(models.Model):
+    """
+    Pre-aggregated activity per hour and per day, kept up to date as money
+    is posted so the manager charts never have to scan Transaction or Loan.
+    Transfers are counted once, on the sending side.
+    """
+    GRANULARITIES = (
+        ('HOUR', 'Hourly'),
+        ('DAY', 'Daily'),
+    )
+    METRICS = Transaction.TRANSACTION_TYPES + (
+        ('LOAN_REQUESTED', 'Loan requested'),
+        ('LOAN_APPROVED', 'Loan approved'),
+        ('LOAN_DENIED', 'Loan denied'),
+    )
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    bucket = models.DateTimeField()
+    metric = models.CharField(max_length=16, choices=METRICS)
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'bucket', 'metric'], name='unique_rollup_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.granularity.lower()} {self.bucket:%Y-%m-%d %H:%M}: {self.count} / {self.total}"
+
+
+class VelocityLimit(models.Model):
+    """
+    Caps how much money, or how many postings, can leave an account within a
+    rolling window. Rows without an account apply to everyone and override
+    the BANKING_VELOCITY_LIMITS setting; rows with an account override both.
+    """
+    TRANSACTION_TYPES = (
+        ('TRANSFER', 'Transfer'),
+        ('WITHDRAWAL', 'Withdrawal'),
+    )
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='velocity_limits', null=True, blank=True)
+    transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
+    window_seconds = models.PositiveIntegerField(default=3600)
+    max_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_count = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'transaction_type'], name='unique_velocity_limit_per_account'),
+        ]
+
+    def __str__(self):
+        owner = self.account.account_number if self.account else 'all accounts'
+        return f"{self.get_transaction_type_display()} limit for {owner}"
+
+
+class ReconciliationRun(models.Model):
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    incremental = models.BooleanField(default=False)
+    accounts_checked = models.PositiveIntegerField(default=0)
+    mismatches = models.PositiveIntegerField(default=0)
+    repaired = models.PositiveIntegerField(default=0)
+    report_path = models.CharField(max_length=255, blank=True)
+    # Accounts found mismatched and not repaired; the next incremental run rechecks them
+    unresolved = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Reconciliation at {self.started_at:%Y-%m-%d %H:%M} ({self.mismatches} mismatches)"
+
+
+class AuditLog(models.Model):
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_entries')
+    # Kept separately so the entry still names the actor if their user is deleted
+    actor_username = models.CharField(max_length=150, blank=True)
+    action = models.CharField(max_length=50)
+    target_type = models.CharField(max_length=50)
+    target_id = models.CharField(max_length=64)
+    before = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    after = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+    path = models.CharField(max_length=255, blank=True)
+    # When the action happened, not when the background writer got to it
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['created_at'], name='audit_created_idx'),
+            models.Index(fields=['action', 'created_at'], name='audit_action_idx'),
+            models.Index(fields=['actor_username', 'created_at'], name='audit_actor_idx'),
+            models.Index(fields=['target_type', 'target_id'], name='audit_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.actor_username} {self.action} {self.target_type}:{self.target_id}"
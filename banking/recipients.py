@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Account
+
+# Recipient preview for the transfer form. Customers type an account number,
+# see a masked holder name, and only then submit. The lookups repeat a lot
+# (the same payees, the same typos), so answers are kept in a small per-process
+# LRU with a TTL. Nothing here is used to move money: transfer_fund re-reads
+# the recipient itself, so a stale entry can only ever show a stale preview.
+
+DEFAULTS = {
+    'max_entries': 2048,
+    'ttl': 60,
+}
+
+_MISSING = object()
+
+
+class PreviewCache:
+    """Bounded LRU mapping with a per-entry TTL. Thread-safe."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = {**DEFAULTS, **getattr(settings, 'RECIPIENT_PREVIEW_CACHE', {})}
+                _cache = PreviewCache(config['max_entries'], config['ttl'])
+    return _cache
+
+
+def mask_name(name):
+    # "Jane Doe" -> "J*** D**"; keeps enough to recognise a payee, not to harvest names
+    return ' '.join(part[0] + '*' * (len(part) - 1) for part in name.split())
+
+
+def preview(account_number):
+    """
+    The masked holder name and whether the account can receive funds, or
+    None for an unknown account number. Unknown numbers are cached too,
+    since retyping the same wrong number is the common case.
+    """
+    cache = get_cache()
+    result = cache.get(account_number)
+    if result is _MISSING:
+        account = (
+            Account.objects.select_related('user')
+            .only('account_number', 'is_frozen', 'user__first_name', 'user__last_name', 'user__username')
+            .filter(account_number=account_number).first()
+        )
+        if account is None:
+            result = None
+        else:
+            result = {
+                'account_number': account.account_number,
+                'name': mask_name(account.user.get_full_name() or account.user.username),
+                'can_receive': not account.is_frozen,
+            }
+        cache.set(account_number, result)
+    return result
+
+
+def invalidate(account_number):
+    get_cache().delete(account_number)
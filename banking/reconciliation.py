@@ -0,0 +1,80 @@
+import django
+from django.db import connections, transaction
+from django.db.models import OuterRef, Q, Subquery, Sum
+
+# Work units for the `reconcile` command. They run in spawned worker
+# processes, so this module must be importable before Django is set up:
+# models are imported inside the functions, not at the top.
+
+
+def init_worker():
+    # Workers are spawned fresh, so they need their own Django setup and DB connections
+    django.setup()
+    connections.close_all()
+
+
+def check_range(low, high, since=None, quick=False, recheck=()):
+    """
+    Compare balance against the ledger for accounts with low <= id < high.
+    Returns (accounts_checked, mismatches) where each mismatch is a
+    (account_id, account_number, balance, ledger_total) tuple.
+
+    With `since`, only accounts touched since then are checked, plus the
+    ids in `recheck` (mismatches a previous run left unrepaired).
+
+    With quick=True the ledger total is taken from the running balance on
+    the account's latest transaction, a primary-key lookup per account
+    instead of a sum over its whole history.
+    """
+    from .models import Account, Transaction
+
+    accounts = Account.objects.filter(id__gte=low, id__lt=high)
+    if since is not None:
+        accounts = accounts.filter(Q(updated_at__gte=since) | Q(id__in=recheck))
+
+    if quick:
+        latest = Transaction.objects.filter(pk=OuterRef('last_transaction_id')).values('balance_after')[:1]
+        rows = accounts.order_by().values_list('id', 'account_number', 'balance').annotate(ledger_total=Subquery(latest))
+    else:
+        # One grouped LEFT JOIN per range, so balance and ledger total come from the same snapshot.
+        rows = accounts.order_by().values_list('id', 'account_number', 'balance').annotate(ledger_total=Sum('transactions__amount'))
+
+    checked = 0
+    mismatches = []
+    for account_id, account_number, balance, ledger_total in rows.iterator(chunk_size=5000):
+        checked += 1
+        ledger_total = ledger_total or 0
+        if balance != ledger_total:
+            mismatches.append((account_id, account_number, balance, ledger_total))
+    return checked, mismatches
+
+
+def repair_account(account_id):
+    """
+    Set an account's balance to its ledger total. The row is locked and the
+    sum recomputed first, so a posting that landed after the check is not
+    mistaken for drift. The latest transaction's running balance, and the
+    account's pointer to it, are brought in line too, so a later --quick
+    run agrees with the repair. Returns True if anything was changed.
+    """
+    from .models import Account, Transaction
+
+    with transaction.atomic():
+        account = Account.objects.select_for_update().get(pk=account_id)
+        ledger_total = account.transactions.order_by().aggregate(total=Sum('amount'))['total'] or 0
+        latest = account.transactions.order_by('-pk').values_list('pk', 'balance_after').first()
+        latest_id, latest_balance = latest or (None, None)
+
+        changed = False
+        if latest is not None and latest_balance != ledger_total:
+            Transaction.objects.filter(pk=latest_id).update(balance_after=ledger_total)
+            changed = True
+        if account.balance != ledger_total or account.last_transaction_id != latest_id:
+            changed = True
+        if not changed:
+            return False
+        account.balance = ledger_total
+        account.last_transaction_id = latest_id
+        account.version += 1
+        account.save(update_fields=['balance', 'version', 'last_transaction_id', 'updated_at'])
+        return True
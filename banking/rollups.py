@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import VolumeRollup
+
+GRANULARITY_STEP = {
+    'HOUR': timedelta(hours=1),
+    'DAY': timedelta(days=1),
+}
+
+
+def bucket_start(when, granularity):
+    when = timezone.localtime(when)
+    if granularity == 'DAY':
+        return when.replace(hour=0, minute=0, second=0, microsecond=0)
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def record(metric, amount, when=None):
+    """
+    Add one event of `amount` to the hourly and daily buckets for `metric`.
+    Runs after the surrounding transaction commits, in its own, so the hot
+    bucket row is never locked while an account row is.
+    """
+    when = when or timezone.now()
+    amount = abs(amount)
+    transaction.on_commit(lambda: _bump_all(metric, amount, when), robust=True)
+
+
+def record_transaction(posted):
+    # The credit leg of a transfer is the same money as the debit leg
+    if posted.transaction_type == 'TRANSFER' and posted.amount > 0:
+        return
+    record(posted.transaction_type, posted.amount, posted.timestamp)
+
+
+def _bump_all(metric, amount, when):
+    with transaction.atomic():
+        for granularity in GRANULARITY_STEP:
+            _bump(granularity, bucket_start(when, granularity), metric, amount)
+
+
+def _bump(granularity, bucket, metric, amount):
+    rows = VolumeRollup.objects.filter(granularity=granularity, bucket=bucket, metric=metric)
+    if rows.update(count=F('count') + 1, total=F('total') + amount):
+        return
+    # First event in this bucket. Another request may be creating it too.
+    try:
+        with transaction.atomic():
+            VolumeRollup.objects.create(granularity=granularity, bucket=bucket, metric=metric, count=1, total=amount)
+    except IntegrityError:
+        rows.update(count=F('count') + 1, total=F('total') + amount)
+
+
+def series(granularity, start, end):
+    """
+    Rollups for [start, end) as a dense, bucket-ordered list of dicts:
+    {'bucket': datetime, METRIC: {'count': n, 'total': Decimal}, ...}.
+    Buckets with no activity are filled with zeros.
+    """
+    step = GRANULARITY_STEP[granularity]
+    start = bucket_start(start, granularity)
+
+    rows = VolumeRollup.objects.filter(granularity=granularity, bucket__gte=start, bucket__lt=end)
+    found = {(row.bucket, row.metric): row for row in rows}
+
+    metrics = [metric for metric, _ in VolumeRollup.METRICS]
+    result = []
+    bucket = start
+    while bucket < end:
+        point = {'bucket': bucket}
+        for metric in metrics:
+            row = found.get((bucket, metric))
+            point[metric] = {'count': row.count if row else 0, 'total': row.total if row else 0}
+        result.append(point)
+        # Step in local time so daily buckets stay on midnight across DST changes
+        bucket = bucket_start(bucket + step + timedelta(hours=1), granularity) if granularity == 'DAY' else bucket + step
+    return result
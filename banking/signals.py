@@ -1,7 +1,11 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.conf import settings
-from .models import Account
+from django.utils import timezone
+from accounts.models import CustomUser
+from . import events, recipients
+from .models import Account, Loan, Transaction
 
 # This signal ensures that a bank account is created for a user upon approval
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -10,4 +14,51 @@ def create_account_on_approval(sender, instance, **kwargs):
     if instance.is_approved and not instance.is_staff:
         # Check if an account does not already exist to prevent duplicates
         if not hasattr(instance, 'account'):
-            Account.objects.create(user=instance)
\ No newline at end of file
+            Account.objects.create(user=instance)
+
+
+def publish_manager_counts():
+    events.get_broker().publish(events.MANAGERS_CHANNEL, {
+        'type': 'counts',
+        'pending_users': CustomUser.objects.filter(is_staff=False, is_approved=False).count(),
+        'pending_loans_count': Loan.objects.filter(status='PENDING').count(),
+    })
+
+
+# Keep the live manager dashboard in step with registrations, approvals and loans.
+# Each publish runs two COUNT queries, so none of this happens with live updates off.
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def notify_managers_of_user_change(sender, instance, update_fields=None, **kwargs):
+    if not settings.BANKING_LIVE_UPDATES:
+        return
+    # Every login saves last_login; that doesn't change any of the counts
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    if not instance.is_staff:
+        transaction.on_commit(publish_manager_counts, robust=True)
+
+
+@receiver(post_save, sender=Loan)
+def notify_managers_of_loan_change(sender, instance, **kwargs):
+    if not settings.BANKING_LIVE_UPDATES:
+        return
+    transaction.on_commit(publish_manager_counts, robust=True)
+
+
+# Drop cached transfer previews when an account appears or is frozen/unfrozen.
+# Ledger postings save with update_fields that never include is_frozen.
+@receiver(post_save, sender=Account)
+def invalidate_recipient_preview(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or 'is_frozen' in update_fields:
+        transaction.on_commit(lambda: recipients.invalidate(instance.account_number), robust=True)
+
+
+# Incremental reconciliation only rechecks accounts whose updated_at moved.
+# Transactions edited or added outside the ledger (the admin, a shell) must
+# count as touching their account, or that drift is never looked at.
+# Deletes are handled by Transaction.delete() and its queryset instead.
+@receiver(post_save, sender=Transaction)
+def touch_account_on_transaction_change(sender, instance, **kwargs):
+    if getattr(instance, '_posted_by_ledger', False):
+        return
+    Account.objects.filter(pk=instance.account_id).update(updated_at=timezone.now())
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from accounts.models import CustomUser
+from . import events
+from .models import Account, Loan
+
+# Server-Sent Events endpoints. These are async views and need to be served
+# over ASGI (your_bank.asgi), e.g. `gunicorn -k uvicorn.workers.UvicornWorker
+# your_bank.asgi:application`, with BANKING_LIVE_UPDATES turned on. Under WSGI
+# a never-ending stream is never sent at all and holds a worker for good, so
+# the views refuse to stream there.
+
+KEEPALIVE_SECONDS = 15
+
+
+def _format(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _stream(channel, initial=None):
+    subscription = await events.get_broker().subscribe(channel)
+    try:
+        # Ask the browser to wait a few seconds before reconnecting
+        yield 'retry: 5000\n\n'
+        if initial is not None:
+            yield _format(initial)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line, keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            yield _format(event)
+    finally:
+        subscription.close()
+
+
+def _event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _streaming_unavailable(request):
+    # 204 tells EventSource to give up instead of reconnecting
+    if not settings.BANKING_LIVE_UPDATES or not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    return None
+
+
+async def _current_user(request):
+    # Fresh from the DB, like customer_and_approved_required / manager_required
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+    return await CustomUser.objects.filter(pk=user.pk).afirst()
+
+
+async def customer_events(request):
+    unavailable = _streaming_unavailable(request)
+    if unavailable is not None:
+        return unavailable
+
+    user = await _current_user(request)
+    if user is None:
+        return HttpResponse(status=401)
+    if user.is_staff or not user.is_approved:
+        return HttpResponse(status=403)
+
+    account = await Account.objects.filter(user=user).afirst()
+    if account is None:
+        return HttpResponse(status=404)
+
+    # Start with the current balance so a reconnecting client catches up
+    initial = {'type': 'balance', 'balance': str(account.balance), 'version': account.version}
+    return _event_stream_response(_stream(events.account_channel(account.pk), initial))
+
+
+async def manager_events(request):
+    unavailable = _streaming_unavailable(request)
+    if unavailable is not None:
+        return unavailable
+
+    user = await _current_user(request)
+    if user is None:
+        return HttpResponse(status=401)
+    if not user.is_staff:
+        return HttpResponse(status=403)
+
+    initial = {
+        'type': 'counts',
+        'pending_users': await CustomUser.objects.filter(is_staff=False, is_approved=False).acount(),
+        'pending_loans_count': await Loan.objects.filter(status='PENDING').acount(),
+    }
+    return _event_stream_response(_stream(events.MANAGERS_CHANNEL, initial))
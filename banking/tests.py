@@ -1,3 +1,497 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.db.models.functions import Abs
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from . import amortization, ledger, views
+from .fields import MoneyField
+from .middleware import RateLimitMiddleware, client_ip, take
+from .models import Account, ReconciliationRun, Transaction, VolumeRollup
+
+
+class MoneyFieldTests(SimpleTestCase):
+    def setUp(self):
+        self.field = MoneyField()
+
+    def test_round_trip(self):
+        for amount in (Decimal('0.00'), Decimal('12.34'), Decimal('-3.05'), Decimal('0.29'), Decimal('9999999999.99')):
+            with self.subTest(amount=amount):
+                stored = self.field.get_prep_value(amount)
+                self.assertIsInstance(stored, int)
+                self.assertEqual(self.field.from_db_value(stored, None, connection), amount)
+
+    def test_values_come_back_as_two_place_decimals(self):
+        value = self.field.from_db_value(1200, None, connection)
+        self.assertEqual(str(value), '12.00')
+        self.assertIsNone(self.field.from_db_value(None, None, connection))
+
+    def test_prep_accepts_ints_and_strings(self):
+        self.assertEqual(self.field.get_prep_value(5), 500)
+        self.assertEqual(self.field.get_prep_value('1.10'), 110)
+        self.assertIsNone(self.field.get_prep_value(None))
+
+    def test_sub_cent_amounts_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.field.get_prep_value(Decimal('0.001'))
+        with self.assertRaises(ValidationError):
+            self.field.to_python('1.234')
+        with self.assertRaises(ValidationError):
+            self.field.to_python('not money')
+
+    def test_to_python_normalises_precision(self):
+        self.assertEqual(str(self.field.to_python('7')), '7.00')
+        self.assertEqual(str(self.field.to_python(Decimal('7.5'))), '7.50')
+
+
+class MoneyFieldDatabaseTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user('saver', password='unused', is_approved=True)
+        self.account = user.account
+        ledger.post(self.account, 'DEPOSIT', Decimal('100.10'), 'Salary')
+        ledger.post(self.account, 'WITHDRAWAL', Decimal('-0.29'), 'Coffee')
+        ledger.post(self.account, 'DEPOSIT', Decimal('0.01'), 'Interest')
+
+    def test_balance_is_exact(self):
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('99.82'))
+
+    def test_sub_cent_amount_cannot_be_saved(self):
+        with self.assertRaises(ValueError):
+            Transaction.objects.create(account=self.account, transaction_type='DEPOSIT', amount=Decimal('0.005'), description='Dust')
+
+    def test_sum_is_scaled_decimal(self):
+        total = self.account.transactions.aggregate(total=Sum('amount'))['total']
+        self.assertIsInstance(total, Decimal)
+        self.assertEqual(total, Decimal('99.82'))
+
+    def test_abs_is_scaled_decimal(self):
+        amounts = self.account.transactions.annotate(size=Abs('amount')).order_by('size').values_list('size', flat=True)
+        self.assertEqual(list(amounts), [Decimal('0.01'), Decimal('0.29'), Decimal('100.10')])
+        total = self.account.transactions.aggregate(total=Sum(Abs('amount')))['total']
+        self.assertEqual(total, Decimal('100.40'))
+
+    def test_filters_compare_in_minor_units(self):
+        self.assertEqual(Account.objects.filter(balance__gte=Decimal('99.82')).count(), 1)
+        self.assertEqual(Account.objects.filter(balance__gt=Decimal('99.82')).count(), 0)
+
+
+class ClientIpTests(SimpleTestCase):
+    def request(self, forwarded):
+        return RequestFactory().get('/', HTTP_X_FORWARDED_FOR=forwarded, REMOTE_ADDR='10.0.0.1')
+
+    @override_settings(RATE_LIMIT_PROXY_DEPTH=0)
+    def test_forwarded_header_ignored_without_proxies(self):
+        self.assertEqual(client_ip(self.request('1.2.3.4')), '10.0.0.1')
+
+    @override_settings(RATE_LIMIT_PROXY_DEPTH=1)
+    def test_spoofed_hops_are_skipped(self):
+        self.assertEqual(client_ip(self.request('6.6.6.6, 203.0.113.7')), '203.0.113.7')
+
+    @override_settings(RATE_LIMIT_PROXY_DEPTH=2)
+    def test_depth_counts_from_the_right(self):
+        self.assertEqual(client_ip(self.request('6.6.6.6, 203.0.113.7, 10.0.0.2')), '203.0.113.7')
+        self.assertEqual(client_ip(self.request('203.0.113.7')), '203.0.113.7')
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_capacity_then_refusal(self):
+        # 3 tokens refilled over 60s: one token every 20s
+        for _ in range(3):
+            self.assertEqual(take('bucket', 3, 60, now=1000), 0)
+        self.assertAlmostEqual(take('bucket', 3, 60, now=1000), 20)
+        self.assertAlmostEqual(take('bucket', 3, 60, now=1005), 15)
+
+    def test_refusals_dont_spend_tokens(self):
+        for _ in range(3):
+            take('bucket', 3, 60, now=1000)
+        for _ in range(10):
+            take('bucket', 3, 60, now=1000)
+        # Still only one token short, not eleven
+        self.assertAlmostEqual(take('bucket', 3, 60, now=1010), 10)
+
+    def test_refill(self):
+        for _ in range(3):
+            take('bucket', 3, 60, now=1000)
+        self.assertEqual(take('bucket', 3, 60, now=1020), 0)
+        self.assertAlmostEqual(take('bucket', 3, 60, now=1020), 20)
+        # Two more tokens after another 40s
+        self.assertEqual(take('bucket', 3, 60, now=1060), 0)
+        self.assertEqual(take('bucket', 3, 60, now=1060), 0)
+        self.assertGreater(take('bucket', 3, 60, now=1060), 0)
+
+    def test_buckets_are_separate(self):
+        take('one', 1, 60, now=1000)
+        self.assertGreater(take('one', 1, 60, now=1000), 0)
+        self.assertEqual(take('two', 1, 60, now=1000), 0)
+
+
+@override_settings(CACHES=LOCMEM, RATE_LIMITS={'transfer_fund': {'methods': ['POST'], 'user': (1, 60)}})
+class RateLimitMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create_user('alice', password='unused', is_approved=True)
+        self.client.force_login(user)
+
+    def test_throttled_before_any_query(self):
+        self.client.post(reverse('transfer_fund'), {})
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('transfer_fund'), {})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+    def test_other_methods_pass(self):
+        self.client.post(reverse('transfer_fund'), {})
+        self.assertEqual(self.client.get(reverse('transfer_fund')).status_code, 200)
+
+    async def test_async_chain(self):
+        async def view(request):
+            return 'reached'
+
+        middleware = RateLimitMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+        request = RequestFactory().post('/')
+        request.resolver_match = resolve(reverse('transfer_fund'))
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = 'abc'
+        self.assertIsNone(await middleware.process_view(request, view, (), {}))
+        self.assertEqual((await middleware.process_view(request, view, (), {})).status_code, 429)
+        self.assertEqual(await middleware(request), 'reached')
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user('alice', password='unused', is_approved=True).account
+        self.bob = CustomUser.objects.create_user('bob', password='unused', is_approved=True).account
+        ledger.post(self.alice, 'DEPOSIT', Decimal('50.00'), 'Salary')
+
+    def test_post_records_running_balance(self):
+        posted = ledger.post(self.alice, 'WITHDRAWAL', Decimal('-20.25'), 'Cash')
+        self.assertEqual(posted.balance_after, Decimal('29.75'))
+        self.assertEqual(self.alice.balance, Decimal('29.75'))
+        self.assertEqual(self.alice.version, 2)
+        self.assertEqual(self.alice.last_transaction_id, posted.pk)
+        stored = Account.objects.get(pk=self.alice.pk)
+        self.assertEqual((stored.balance, stored.version, stored.last_transaction_id), (Decimal('29.75'), 2, posted.pk))
+
+    def test_insufficient_funds_changes_nothing(self):
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.post(self.alice, 'WITHDRAWAL', Decimal('-50.01'), 'Too much')
+        stored = Account.objects.get(pk=self.alice.pk)
+        self.assertEqual((stored.balance, stored.version), (Decimal('50.00'), 1))
+        self.assertEqual(stored.transactions.count(), 1)
+
+    def test_transfer_debits_and_credits(self):
+        ledger.transfer(self.alice, self.bob, Decimal('12.50'), 'To bob', 'From alice')
+        self.assertEqual(Account.objects.get(pk=self.alice.pk).balance, Decimal('37.50'))
+        self.assertEqual(Account.objects.get(pk=self.bob.pk).balance, Decimal('12.50'))
+        sent = self.alice.transactions.get(transaction_type='TRANSFER')
+        received = self.bob.transactions.get(transaction_type='TRANSFER')
+        self.assertEqual((sent.amount, sent.balance_after), (Decimal('-12.50'), Decimal('37.50')))
+        self.assertEqual((received.amount, received.balance_after), (Decimal('12.50'), Decimal('12.50')))
+
+    def test_transfer_without_funds_moves_nothing(self):
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.transfer(self.alice, self.bob, Decimal('75.00'), 'To bob', 'From alice')
+        self.assertEqual(Account.objects.get(pk=self.alice.pk).balance, Decimal('50.00'))
+        self.assertEqual(Account.objects.get(pk=self.bob.pk).balance, Decimal('0.00'))
+        self.assertFalse(Transaction.objects.filter(transaction_type='TRANSFER').exists())
+
+
+class LiveUpdateTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('alice', password='unused', is_approved=True)
+
+    def changes(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            ledger.post(self.user.account, 'DEPOSIT', Decimal('5.00'), 'Salary')
+            self.user.loans.create(amount=Decimal('100.00'), reason='Bike')
+            self.user.save()
+        return len(callbacks)
+
+    def test_only_published_when_on(self):
+        with override_settings(BANKING_LIVE_UPDATES=False):
+            off = self.changes()
+        with override_settings(BANKING_LIVE_UPDATES=True):
+            on = self.changes()
+        # The posting's event plus manager counts for the loan and the user
+        self.assertEqual(on - off, 3)
+
+
+class ReconcileCommandTests(TestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user('alice', password='unused', is_approved=True).account
+        self.bob = CustomUser.objects.create_user('bob', password='unused', is_approved=True).account
+        ledger.post(self.alice, 'DEPOSIT', Decimal('40.00'), 'Salary')
+        ledger.post(self.bob, 'DEPOSIT', Decimal('10.00'), 'Salary')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.report = os.path.join(directory.name, 'report.csv')
+
+    def reconcile(self, *args):
+        call_command('reconcile', '--workers', '1', '--report', self.report, *args, stdout=open(os.devnull, 'w'))
+        with open(self.report, newline='') as f:
+            rows = list(csv.DictReader(f))
+        return ReconciliationRun.objects.first(), rows
+
+    def drift(self, account, balance):
+        # Behind the ledger's back, and without touching updated_at
+        Account.objects.filter(pk=account.pk).update(balance=balance)
+
+    def test_clean_books(self):
+        run, rows = self.reconcile('--full')
+        self.assertEqual((run.accounts_checked, run.mismatches, run.repaired), (2, 0, 0))
+        self.assertEqual(rows, [])
+
+    def test_reports_without_repairing(self):
+        self.drift(self.alice, Decimal('45.00'))
+        run, rows = self.reconcile('--full')
+        self.assertEqual((run.mismatches, run.repaired, run.unresolved), (1, 0, [self.alice.pk]))
+        self.assertEqual(rows[0]['difference'], '5.00')
+        self.assertEqual(rows[0]['repaired'], 'False')
+        self.assertEqual(Account.objects.get(pk=self.alice.pk).balance, Decimal('45.00'))
+
+    def test_repair(self):
+        self.drift(self.alice, Decimal('45.00'))
+        run, rows = self.reconcile('--full', '--repair')
+        self.assertEqual((run.mismatches, run.repaired, run.unresolved), (1, 1, []))
+        self.assertEqual(rows[0]['repaired'], 'True')
+        self.assertEqual(Account.objects.get(pk=self.alice.pk).balance, Decimal('40.00'))
+        run, rows = self.reconcile('--full')
+        self.assertEqual(run.mismatches, 0)
+
+    def test_incremental_only_checks_touched_accounts(self):
+        self.reconcile('--full')
+        # Untouched drift is out of scope for an incremental run...
+        self.drift(self.bob, Decimal('99.00'))
+        # ...but a transaction added outside the ledger touches its account
+        Transaction.objects.create(account=self.alice, transaction_type='DEPOSIT', amount=Decimal('1.00'), description='Manual')
+        run, rows = self.reconcile()
+        self.assertTrue(run.incremental)
+        self.assertEqual(run.accounts_checked, 1)
+        self.assertEqual([row['account_id'] for row in rows], [str(self.alice.pk)])
+
+    def test_incremental_rechecks_unresolved(self):
+        self.drift(self.alice, Decimal('45.00'))
+        self.reconcile('--full')
+        run, rows = self.reconcile()
+        self.assertEqual(run.accounts_checked, 1)
+        self.assertEqual(run.unresolved, [self.alice.pk])
+        run, rows = self.reconcile('--repair')
+        self.assertEqual((run.repaired, run.unresolved), (1, []))
+        run, rows = self.reconcile()
+        self.assertEqual(run.accounts_checked, 1)  # touched by the repair
+        self.assertEqual(run.mismatches, 0)
+
+    def test_quick_repair_sticks(self):
+        # Correct balance, but the latest running balance disagrees with it
+        Transaction.objects.filter(pk=self.alice.last_transaction_id).update(balance_after=Decimal('39.00'))
+        run, rows = self.reconcile('--full', '--quick', '--repair')
+        self.assertEqual((run.mismatches, run.repaired, run.unresolved), (1, 1, []))
+        self.assertEqual(rows[0]['latest_balance_after'], '39.00')
+        run, rows = self.reconcile('--full', '--quick', '--repair')
+        self.assertEqual(run.mismatches, 0)
+
+    def test_full_repair_leaves_quick_mode_agreeing(self):
+        # Outside the ledger: no running balance, and last_transaction_id not moved
+        Transaction.objects.create(account=self.alice, transaction_type='DEPOSIT', amount=Decimal('1.00'), description='Manual')
+        run, rows = self.reconcile('--full', '--repair')
+        self.assertEqual(run.repaired, 1)
+        run, rows = self.reconcile('--full', '--quick')
+        self.assertEqual(run.mismatches, 0)
+        account = Account.objects.get(pk=self.alice.pk)
+        self.assertEqual(account.balance, Decimal('41.00'))
+        self.assertEqual(account.transactions.get(pk=account.last_transaction_id).balance_after, Decimal('41.00'))
+
+    def test_deleting_a_transaction_touches_its_account(self):
+        self.reconcile('--full')
+        self.alice.transactions.get().delete()
+        Transaction.objects.filter(account=self.bob).delete()
+        run, rows = self.reconcile()
+        self.assertEqual(run.accounts_checked, 2)
+        self.assertEqual(run.mismatches, 2)
+
+    def test_deleting_a_user_fast_deletes_transactions(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.alice.user.delete()
+        fetched = [q['sql'] for q in captured.captured_queries if q['sql'].startswith('SELECT') and 'banking_transaction' in q['sql']]
+        self.assertEqual(fetched, [])
+        self.assertFalse(Transaction.objects.filter(account_id=self.alice.pk).exists())
+
+
+class AnalyticsDataTests(TestCase):
+    def setUp(self):
+        manager = CustomUser.objects.create_user('manager', password='unused', is_staff=True)
+        self.client.force_login(manager)
+
+    def fetch(self, **params):
+        return self.client.get(reverse('manager_analytics_data'), params)
+
+    def rollup(self, day):
+        bucket = timezone.make_aware(datetime.combine(day, time.min))
+        VolumeRollup.objects.create(granularity='DAY', bucket=bucket, metric='DEPOSIT', count=1, total=Decimal('5.00'))
+
+    def test_open_ended_range_without_rollups_is_empty(self):
+        response = self.fetch(start='0001-01-01', end='9999-12-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['labels'], [])
+
+    def test_range_starts_at_first_rollup(self):
+        today = timezone.localdate()
+        self.rollup(today - timedelta(days=2))
+        response = self.fetch(start='0001-01-01')
+        data = response.json()
+        self.assertEqual(len(data['labels']), 3)
+        self.assertEqual(data['series']['DEPOSIT']['count'], [1, 0, 0])
+
+    def test_daily_points_are_capped(self):
+        today = timezone.localdate()
+        self.rollup(today - timedelta(days=views.ANALYTICS_MAX_DAILY_DAYS))
+        self.assertEqual(self.fetch(start='0001-01-01').status_code, 400)
+        start = today - timedelta(days=views.ANALYTICS_MAX_DAILY_DAYS - 1)
+        self.assertEqual(len(self.fetch(start=start.isoformat()).json()['labels']), views.ANALYTICS_MAX_DAILY_DAYS)
+
+
+class MoneyMinorUnitsMigrationTests(TransactionTestCase):
+    before = [('banking', '0009_transaction_balance_after')]
+    after = [('banking', '0010_money_minor_units')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        # Leave the schema at the latest migration for the other tests
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_forward_and_backward(self):
+        apps = self.migrate(self.before)
+        user = apps.get_model('accounts', 'CustomUser').objects.create(username='legacy', password='unused')
+        account = apps.get_model('banking', 'Account').objects.create(user=user, account_number='1234567890', balance=Decimal('10.29'))
+        TransactionModel = apps.get_model('banking', 'Transaction')
+        rows = [
+            (Decimal('10.58'), Decimal('10.58')),
+            (Decimal('-0.29'), Decimal('10.29')),
+            (Decimal('0.01'), None),
+        ]
+        for amount, balance_after in rows:
+            TransactionModel.objects.create(
+                account=account, transaction_type='DEPOSIT', amount=amount,
+                balance_after=balance_after, description='Legacy',
+            )
+
+        apps = self.migrate(self.after)
+        account = apps.get_model('banking', 'Account').objects.get(account_number='1234567890')
+        self.assertEqual(account.balance, Decimal('10.29'))
+        migrated = list(apps.get_model('banking', 'Transaction').objects.order_by('id').values_list('amount', 'balance_after'))
+        self.assertEqual(migrated, rows)
+        # Stored as whole cents underneath
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT amount FROM banking_transaction ORDER BY id')
+            self.assertEqual([row[0] for row in cursor.fetchall()], [1058, -29, 1])
+
+        apps = self.migrate(self.before)
+        account = apps.get_model('banking', 'Account').objects.get(account_number='1234567890')
+        self.assertEqual(account.balance, Decimal('10.29'))
+        restored = list(apps.get_model('banking', 'Transaction').objects.order_by('id').values_list('amount', 'balance_after'))
+        self.assertEqual(restored, rows)
+
+
+def _reference_cashflows(loans, horizon):
+    # Month-by-month simulation, one loan at a time; what the vectorised maths must agree with
+    interest = [0.0] * horizon
+    outstanding = [0.0] * (horizon + 1)
+    for principal, annual_rate, term, paid in loans:
+        rate = annual_rate / 1200
+        payment = principal / term if rate == 0 else principal * rate / (1 - (1 + rate) ** -term)
+        balance = principal
+        balances = [balance]
+        for _ in range(term):
+            balance = balance * (1 + rate) - payment
+            balances.append(balance)
+        balances[-1] = 0.0
+        balances += [0.0] * (horizon + 1)
+        start = min(paid, term)
+        for month in range(horizon + 1):
+            outstanding[month] += balances[start + month]
+            if month < horizon:
+                interest[month] += balances[start + month] * rate
+    principal_due = [outstanding[m] - outstanding[m + 1] for m in range(horizon)]
+    return interest, principal_due, outstanding[1:]
+
+
+class AmortizationTests(SimpleTestCase):
+    # (principal, annual rate %, term months, payments made)
+    LOANS = [
+        (10000.0, 5.0, 12, 0),
+        (2500.0, 0.0, 24, 3),       # zero rate
+        (50000.0, 7.25, 360, 120),  # long term, part paid
+        (1200.0, 12.0, 6, 6),       # fully paid
+        (800.0, 3.5, 18, 40),       # paid count past the term
+        (3000.0, 0.0, 1, 0),        # zero rate, single payment
+        (75000.0, 19.99, 60, 59),   # one payment left
+    ]
+
+    def _columns(self, loans):
+        return [np.array(column) for column in zip(*loans)]
+
+    def test_portfolio_cashflows_match_reference(self):
+        principal, rate, term, paid = self._columns(self.LOANS)
+        for horizon in (None, 6, 300):
+            with self.subTest(horizon=horizon):
+                flows = amortization.portfolio_cashflows(principal, rate, term, paid, horizon=horizon)
+                expected_horizon = horizon if horizon is not None else 240
+                interest, principal_due, outstanding = _reference_cashflows(self.LOANS, expected_horizon)
+                np.testing.assert_allclose(flows['interest'], interest, atol=1e-6)
+                np.testing.assert_allclose(flows['principal'], principal_due, atol=1e-6)
+                np.testing.assert_allclose(flows['outstanding'], outstanding, atol=1e-6)
+
+    def test_fully_paid_book_owes_nothing(self):
+        flows = amortization.portfolio_cashflows([1000.0, 500.0], [5.0, 0.0], [12, 6], [12, 6], horizon=3)
+        for values in flows.values():
+            np.testing.assert_array_equal(values, np.zeros(3))
+
+    def test_schedule_matches_reference(self):
+        loans = [(principal, rate, term, 0) for principal, rate, term, _ in self.LOANS]
+        principal, rate, term, _ = self._columns(loans)
+        result = amortization.schedule(principal, rate, term)
+        self.assertEqual(result['balance'].shape, (len(loans), 360))
+        for row, loan in enumerate(loans):
+            interest, principal_due, outstanding = _reference_cashflows([loan], 360)
+            np.testing.assert_allclose(result['interest'][row], interest, atol=1e-6)
+            np.testing.assert_allclose(result['principal'][row], principal_due, atol=1e-6)
+            np.testing.assert_allclose(result['balance'][row], outstanding, atol=1e-6)
+
+    def test_remaining_balance_matches_schedule(self):
+        principal, rate, term, paid = self._columns(self.LOANS)
+        horizon = 400
+        expected = [_reference_cashflows([(p, r, n, 0)], horizon)[2][min(k, n) - 1] if min(k, n) else p
+                    for p, r, n, k in self.LOANS]
+        np.testing.assert_allclose(amortization.remaining_balance(principal, rate, term, paid), expected, atol=1e-6)
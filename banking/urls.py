@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, api, streams
 
 urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
@@ -12,13 +12,26 @@ urlpatterns = [
     path('history/', views.transaction_history, name='transaction_history'),
     path('loan/request/', views.request_loan, name='request_loan'),
 
+    # JSON API for the mobile app
+    path('api/account/', api.account_summary, name='api_account_summary'),
+    path('api/transactions/', api.transactions, name='api_transactions'),
+    path('api/recipient/', api.recipient_preview, name='api_recipient_preview'),
+
+    # Live updates (Server-Sent Events, served over ASGI)
+    path('events/customer/', streams.customer_events, name='customer_events'),
+    path('events/manager/', streams.manager_events, name='manager_events'),
+
     # Manager URLs
     path('manager/dashboard/', views.manager_dashboard, name='manager_dashboard'),
+    path('manager/analytics/', views.manager_analytics, name='manager_analytics'),
+    path('manager/analytics/data/', views.manager_analytics_data, name='manager_analytics_data'),
+    path('manager/audit/', views.audit_log, name='audit_log'),
     path('manager/customers/', views.customer_management, name='customer_management'),
     path('manager/customers/<int:user_id>/', views.customer_details, name='customer_details'),
     path('manager/approvals/', views.pending_approvals, name='pending_approvals'),
     path('manager/approve/<int:user_id>/', views.approve_user, name='approve_user'),
     path('manager/freeze/<int:account_id>/', views.toggle_freeze_account, name='toggle_freeze_account'),
     path('manager/loans/', views.loan_requests_list, name='loan_requests_list'),
+    path('manager/loans/portfolio/', views.loan_portfolio, name='loan_portfolio'),
     path('manager/loans/<int:loan_id>/<str:action>/', views.process_loan, name='process_loan'),
 ]
\ No newline at end of file
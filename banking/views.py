@@ -1,12 +1,19 @@
+from datetime import datetime, time, timedelta
+from urllib.parse import urlencode
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db.models import Count, Sum
+from django.http import JsonResponse
 from accounts.models import CustomUser
-from .models import Account, Transaction, Loan
-from .forms import FundTransferForm, DepositWithdrawForm, LoanRequestForm
+from .models import Account, Transaction, Loan, VolumeRollup, AuditLog
+from .forms import FundTransferForm, DepositWithdrawForm, LoanRequestForm, LoanApprovalForm
 # IMPORTANT: We are now importing our new, correct decorators
 from .decorators import customer_and_approved_required, manager_required
+from . import amortization, audit, ledger, limits, rollups
 from django.utils import timezone
 
 
@@ -33,7 +40,7 @@ def dashboard(request):
 def customer_dashboard(request):
     account = get_object_or_404(Account, user=request.user)
     transactions = account.transactions.all()[:10]
-    context = {'account': account, 'transactions': transactions}
+    context = {'account': account, 'transactions': transactions, 'live_updates': settings.BANKING_LIVE_UPDATES}
     return render(request, 'banking/customer_dashboard.html', context)
 
 
@@ -68,7 +75,7 @@ def transfer_fund(request):
             else:
                 # If initial checks pass, try to find the recipient
                 try:
-                    recipient_account = Account.objects.get(account_number=recipient_account_number)
+                    recipient_account = Account.objects.select_related('user').get(account_number=recipient_account_number)
 
                     # NEW: Check if the RECIPIENT's account is frozen
                     if recipient_account.is_frozen:
@@ -76,25 +83,20 @@ def transfer_fund(request):
                     
                     else:
                         # --- SUCCESS: All checks passed. Perform the transaction. ---
-                        
-                        # Debit sender
-                        sender_account.balance -= amount
-                        sender_account.save()
-                        Transaction.objects.create(
-                            account=sender_account, transaction_type='TRANSFER', amount=-amount,
-                            description=f"Sent to {recipient_account.user.get_full_name()} ({recipient_account.account_number})"
-                        )
-                        
-                        # Credit recipient
-                        recipient_account.balance += amount
-                        recipient_account.save()
-                        Transaction.objects.create(
-                            account=recipient_account, transaction_type='TRANSFER', amount=amount,
-                            description=f"Received from {sender_account.user.get_full_name()} ({sender_account.account_number})"
-                        )
-                        
-                        messages.success(request, f'Successfully transferred ${amount} to account {recipient_account_number}.')
-                        return redirect('customer_dashboard')
+                        # Both balances are re-read under a row lock before being changed.
+                        try:
+                            ledger.transfer(
+                                sender_account, recipient_account, amount,
+                                sent_description=f"Sent to {recipient_account.user.get_full_name()} ({recipient_account.account_number})",
+                                received_description=f"Received from {request.user.get_full_name()} ({sender_account.account_number})",
+                            )
+                        except ledger.InsufficientFunds:
+                            messages.error(request, 'Insufficient funds.')
+                        except limits.VelocityLimitExceeded as e:
+                            messages.error(request, str(e))
+                        else:
+                            messages.success(request, f'Successfully transferred ${amount} to account {recipient_account_number}.')
+                            return redirect('customer_dashboard')
 
                 except Account.DoesNotExist:
                     messages.error(request, "The recipient account number does not exist.")
@@ -117,11 +119,7 @@ def deposit_money(request):
         form = DepositWithdrawForm(request.POST)
         if form.is_valid():
             amount = form.cleaned_data['amount']
-            account.balance += amount
-            account.save()
-            Transaction.objects.create(
-                account=account, transaction_type='DEPOSIT', amount=amount, description="Cash Deposit"
-            )
+            ledger.post(account, 'DEPOSIT', amount, "Cash Deposit")
             messages.success(request, f'${amount} has been deposited to your account.')
             return redirect('customer_dashboard')
     else:
@@ -137,14 +135,13 @@ def withdraw_money(request):
         form = DepositWithdrawForm(request.POST)
         if form.is_valid():
             amount = form.cleaned_data['amount']
-            if account.balance < amount:
+            try:
+                ledger.post(account, 'WITHDRAWAL', -amount, "Cash Withdrawal")
+            except ledger.InsufficientFunds:
                 messages.error(request, 'Insufficient funds.')
+            except limits.VelocityLimitExceeded as e:
+                messages.error(request, str(e))
             else:
-                account.balance -= amount
-                account.save()
-                Transaction.objects.create(
-                    account=account, transaction_type='WITHDRAWAL', amount=-amount, description="Cash Withdrawal"
-                )
                 messages.success(request, f'You have successfully withdrawn ${amount}.')
                 return redirect('customer_dashboard')
     else:
@@ -170,10 +167,107 @@ def manager_dashboard(request):
         'active_customers': CustomUser.objects.filter(is_staff=False, is_approved=True).count(),
         'total_transactions': Transaction.objects.count(),
         'pending_loans_count': Loan.objects.filter(status='PENDING').count(),
+        'live_updates': settings.BANKING_LIVE_UPDATES,
     }
     return render(request, 'banking/manager_dashboard.html', context)
 
 
+def _approval_rate(point):
+    # Share of decided loans that were approved; None when nothing was decided
+    approved = point['LOAN_APPROVED']['count']
+    decided = approved + point['LOAN_DENIED']['count']
+    return round(approved / decided, 4) if decided else None
+
+
+# Hourly series are dense (24 points a day per metric), so they're limited to a
+# month; daily series can span any range, trimmed to the days that have data
+ANALYTICS_MAX_HOURLY_DAYS = 31
+# Daily points are cheap, but the series is dense: cap it at about five years
+ANALYTICS_MAX_DAILY_DAYS = 1830
+
+
+@login_required
+@manager_required
+def manager_analytics(request):
+    context = {'max_hourly_days': ANALYTICS_MAX_HOURLY_DAYS, 'max_daily_years': ANALYTICS_MAX_DAILY_DAYS // 366}
+    return render(request, 'banking/manager_analytics.html', context)
+
+
+@login_required
+@manager_required
+def manager_analytics_data(request):
+    granularity = request.GET.get('granularity', 'day').upper()
+    if granularity not in ('HOUR', 'DAY'):
+        return JsonResponse({'detail': "granularity must be 'hour' or 'day'."}, status=400)
+
+    today = timezone.localdate()
+    try:
+        end_day = datetime.strptime(request.GET['end'], '%Y-%m-%d').date() if 'end' in request.GET else today
+        start_day = datetime.strptime(request.GET['start'], '%Y-%m-%d').date() if 'start' in request.GET else end_day - timedelta(days=29)
+    except ValueError:
+        return JsonResponse({'detail': 'Dates must be YYYY-MM-DD.'}, status=400)
+    if start_day > end_day:
+        return JsonResponse({'detail': 'The start date must not be after the end date.'}, status=400)
+    if granularity == 'HOUR' and (end_day - start_day).days >= ANALYTICS_MAX_HOURLY_DAYS:
+        return JsonResponse({'detail': f'Hourly data covers at most {ANALYTICS_MAX_HOURLY_DAYS} days; group by day for longer ranges.'}, status=400)
+
+    # Nothing is recorded before the first rollup or after today, so don't
+    # send empty points for those days
+    end_day = min(end_day, today)
+    first = VolumeRollup.objects.filter(granularity=granularity).order_by('bucket').values_list('bucket', flat=True).first()
+    if first is None or timezone.localtime(first).date() > end_day:
+        points = []
+    else:
+        start_day = max(start_day, timezone.localtime(first).date())
+        if (end_day - start_day).days >= ANALYTICS_MAX_DAILY_DAYS:
+            return JsonResponse({'detail': f'Daily data covers at most {ANALYTICS_MAX_DAILY_DAYS} days; narrow the range.'}, status=400)
+        start = timezone.make_aware(datetime.combine(start_day, time.min))
+        end = timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min))
+        points = rollups.series(granularity, start, end)
+
+    metrics = [metric for metric, _ in VolumeRollup.METRICS]
+    data = {
+        'granularity': granularity.lower(),
+        'labels': [point['bucket'].isoformat() for point in points],
+        'series': {
+            metric: {
+                'count': [point[metric]['count'] for point in points],
+                'total': [str(point[metric]['total']) for point in points],
+            }
+            for metric in metrics
+        },
+        'loan_approval_rate': [_approval_rate(point) for point in points],
+    }
+    return JsonResponse(data)
+
+
+@login_required
+@manager_required
+def audit_log(request):
+    entries = AuditLog.objects.all()
+
+    # Each filter lines up with one of the AuditLog indexes
+    filters = {
+        'action': request.GET.get('action', '').strip(),
+        'actor': request.GET.get('actor', '').strip(),
+        'target_type': request.GET.get('target_type', '').strip(),
+        'target_id': request.GET.get('target_id', '').strip(),
+    }
+    if filters['action']:
+        entries = entries.filter(action=filters['action'])
+    if filters['actor']:
+        entries = entries.filter(actor_username=filters['actor'])
+    if filters['target_type']:
+        entries = entries.filter(target_type=filters['target_type'])
+        if filters['target_id']:
+            entries = entries.filter(target_id=filters['target_id'])
+
+    page = Paginator(entries, 50).get_page(request.GET.get('page'))
+    query = {key: value for key, value in filters.items() if value}
+    context = {'page': page, 'filters': filters, 'query': urlencode(query)}
+    return render(request, 'banking/audit_log.html', context)
+
+
 @login_required
 @manager_required
 def customer_management(request):
@@ -199,8 +293,10 @@ def pending_approvals(request):
 @manager_required
 def approve_user(request, user_id):
     user = get_object_or_404(CustomUser, id=user_id)
+    before = audit.snapshot(user, ['is_approved'])
     user.is_approved = True
     user.save()
+    audit.record(request, 'approve_user', user, before, audit.snapshot(user, ['is_approved']))
     messages.success(request, f'User {user.username} has been approved and their account is now active.')
     return redirect('pending_approvals')
 
@@ -209,8 +305,10 @@ def approve_user(request, user_id):
 @manager_required
 def toggle_freeze_account(request, account_id):
     account = get_object_or_404(Account, id=account_id)
+    before = audit.snapshot(account, ['is_frozen'])
     account.is_frozen = not account.is_frozen
     account.save()
+    audit.record(request, 'freeze_account' if account.is_frozen else 'unfreeze_account', account, before, audit.snapshot(account, ['is_frozen']))
     status = "frozen" if account.is_frozen else "unfrozen"
     messages.success(request, f'Account {account.account_number} has been {status}.')
     return redirect('customer_details', user_id=account.user.id)
@@ -225,6 +323,7 @@ def request_loan(request):
             loan = form.save(commit=False)
             loan.user = request.user
             loan.save()
+            rollups.record('LOAN_REQUESTED', loan.amount, loan.requested_at)
             messages.success(request, 'Your loan request has been submitted successfully.')
             return redirect('customer_dashboard')
     else:
@@ -235,9 +334,69 @@ def request_loan(request):
 @login_required
 @manager_required
 def loan_requests_list(request):
-    pending_loans = Loan.objects.filter(status='PENDING').order_by('requested_at')
+    pending_loans = list(Loan.objects.filter(status='PENDING').select_related('user').order_by('requested_at'))
+
+    # Work out the repayment figures for all pending loans in one go
+    if pending_loans:
+        principal = [loan.amount for loan in pending_loans]
+        rates = [loan.interest_rate for loan in pending_loans]
+        terms = [loan.term_months for loan in pending_loans]
+        payments = amortization.monthly_payment(principal, rates, terms)
+        for loan, payment in zip(pending_loans, payments):
+            loan.monthly_payment = payment
+            loan.total_interest = payment * loan.term_months - float(loan.amount)
+
     return render(request, 'banking/loan_requests_list.html', {'loans': pending_loans})
 
+
+def _months_between(start, end):
+    # Number of whole monthly payments due between two dates
+    months = (end.year - start.year) * 12 + (end.month - start.month)
+    if end.day < start.day:
+        months -= 1
+    return max(months, 0)
+
+
+def _add_months(date, months):
+    month_index = date.month - 1 + months
+    return date.replace(year=date.year + month_index // 12, month=month_index % 12 + 1, day=1)
+
+
+@login_required
+@manager_required
+def loan_portfolio(request):
+    now = timezone.now()
+    approved = Loan.objects.filter(status='APPROVED').values_list('amount', 'interest_rate', 'term_months', 'processed_at')
+    rows = list(approved)
+
+    schedule = []
+    outstanding_principal = interest_due = 0
+    if rows:
+        amounts, rates, terms, processed = zip(*rows)
+        paid = [_months_between(processed_at or now, now) for processed_at in processed]
+        outstanding_principal = amortization.remaining_balance(amounts, rates, terms, paid).sum()
+
+        flows = amortization.portfolio_cashflows(amounts, rates, terms, paid)
+        interest_due = flows['interest'].sum()
+        first_month = _add_months(now.date(), 1)
+        for i, (interest, principal, balance) in enumerate(zip(flows['interest'], flows['principal'], flows['outstanding'])):
+            schedule.append({
+                'month': _add_months(first_month, i),
+                'interest': interest,
+                'principal': principal,
+                'outstanding': balance,
+            })
+
+    totals = {row['status']: row for row in Loan.objects.values('status').annotate(count=Count('id'), total=Sum('amount'))}
+    context = {
+        'outstanding_principal': outstanding_principal,
+        'interest_due': interest_due,
+        'approved': totals.get('APPROVED', {'count': 0, 'total': 0}),
+        'pending': totals.get('PENDING', {'count': 0, 'total': 0}),
+        'schedule': schedule,
+    }
+    return render(request, 'banking/loan_portfolio.html', context)
+
 @login_required
 @manager_required
 @transaction.atomic
@@ -257,20 +416,18 @@ def process_loan(request, loan_id, action):
         return redirect('loan_requests_list')
 
     # If the account is NOT frozen, we can proceed.
+    before = audit.snapshot(loan, ['status', 'processed_at', 'interest_rate'])
     if action == 'approve':
+        if request.method == 'POST':
+            form = LoanApprovalForm(request.POST)
+            if not form.is_valid():
+                messages.error(request, 'Please enter an interest rate between 0 and 100%.')
+                return redirect('loan_requests_list')
+            loan.interest_rate = form.cleaned_data['interest_rate']
         loan.status = 'APPROVED'
         
         # Deposit the loan amount into the user's account
-        user_account.balance += loan.amount
-        user_account.save()
-        
-        # Create a transaction record
-        Transaction.objects.create(
-            account=user_account,
-            transaction_type='DEPOSIT',
-            amount=loan.amount,
-            description=f"Loan approved: {loan.reason[:50]}"
-        )
+        ledger.post(user_account, 'DEPOSIT', loan.amount, f"Loan approved: {loan.reason[:50]}")
         messages.success(request, f'Loan for {loan.user.username} has been approved and funds have been deposited.')
         
     elif action == 'deny':
@@ -280,5 +437,8 @@ def process_loan(request, loan_id, action):
     # Mark the loan as processed with the current time
     loan.processed_at = timezone.now()
     loan.save()
+    if loan.status != 'PENDING':
+        rollups.record(f'LOAN_{loan.status}', loan.amount, loan.processed_at)
+        audit.record(request, f'{action}_loan', loan, before, audit.snapshot(loan, ['status', 'processed_at', 'interest_rate']))
     
     return redirect('loan_requests_list')
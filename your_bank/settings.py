@@ -58,6 +58,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'banking.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -94,6 +95,71 @@ DATABASES = {
 }
 
 
+# Cache
+# Velocity limits keep their counters here. Point REDIS_URL at a shared Redis
+# so every worker sees the same counters; the local-memory fallback is
+# per-process and only suitable for development.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Live update streams. The in-process broker only reaches streams held by the
+# same worker; with Redis available, events fan out to every worker.
+
+if os.environ.get('REDIS_URL'):
+    BANKING_EVENTS = {
+        'BACKEND': 'banking.events.RedisBroker',
+        'OPTIONS': {'url': os.environ['REDIS_URL']},
+    }
+else:
+    BANKING_EVENTS = {
+        'BACKEND': 'banking.events.InProcessBroker',
+    }
+
+# The dashboards' live streams (banking/streams.py) only work when the app is
+# served over ASGI: `gunicorn -k uvicorn.workers.UvicornWorker your_bank.asgi:application`.
+# Leave this off under WSGI (runserver, plain gunicorn); the pages then load
+# without opening a stream and the stream endpoints answer 204.
+BANKING_LIVE_UPDATES = os.environ.get('BANKING_LIVE_UPDATES', '').lower() in ('1', 'true', 'yes')
+
+
+# Sessions. By default every request reads (and often writes) django_session,
+# competing with ledger writes. SESSION_MODE picks something lighter:
+#   cache           sessions live only in the shared cache
+#   cached_db       reads from the shared cache, writes through to the database
+#   signed_cookies  no server-side storage at all; sessions can't be revoked
+#                   server-side before they expire, only replaced on logout
+#   db              Django's default
+# cache and cached_db need REDIS_URL. The local-memory fallback is per
+# process, so a session logged out on one worker would stay valid in another
+# worker's copy; without a shared cache they fall back to db.
+# Flash messages go in a cookie, so they never touch the session either.
+
+SESSION_MODE = os.environ.get('SESSION_MODE', 'cache')
+if SESSION_MODE in ('cache', 'cached_db') and not os.environ.get('REDIS_URL'):
+    SESSION_MODE = 'db'
+SESSION_ENGINE = {
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'db': 'django.contrib.sessions.backends.db',
+}[SESSION_MODE]
+
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -150,6 +216,39 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+# Default velocity limits on money leaving an account. Individual accounts,
+# or all accounts at once, can be overridden with VelocityLimit rows in the admin.
+BANKING_VELOCITY_LIMITS = {
+    'TRANSFER': {'window': 3600, 'max_amount': '10000.00', 'max_count': 10},
+    'WITHDRAWAL': {'window': 3600, 'max_amount': '5000.00', 'max_count': 10},
+}
+
+# Background writer for the manager audit log (see banking/audit.py)
+AUDIT_LOG = {
+    'max_queue': 10000,
+    'batch_size': 500,
+    'flush_interval': 1.0,
+}
+
+# Token-bucket throttling per URL name (see banking/middleware.py). Each scope
+# is (burst, seconds to refill the whole burst); buckets live in the default cache.
+RATE_LIMITS = {
+    'login': {'methods': ['POST'], 'ip': (20, 60), 'user': (5, 300)},
+    'register': {'methods': ['POST'], 'ip': (5, 600)},
+    'transfer_fund': {'methods': ['POST'], 'ip': (30, 60), 'user': (10, 60)},
+    'api_recipient_preview': {'ip': (60, 60), 'user': (30, 60)},
+}
+
+# Render puts one proxy in front of the app, which appends the real client
+# address to X-Forwarded-For.
+RATE_LIMIT_PROXY_DEPTH = 1 if RENDER_EXTERNAL_HOSTNAME else 0
+
+# Per-process cache behind the transfer form's recipient preview
+RECIPIENT_PREVIEW_CACHE = {
+    'max_entries': 2048,
+    'ttl': 60,
+}
+
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGIN_URL = 'login'
 LOGOUT_REDIRECT_URL = 'landing_page'